@@ -1,6 +1,6 @@
 {
     'name': 'GearGuard - Maintenance Management',
-    'version': '1.0',
+    'version': '17.0.1.0',
     'category': 'Operations/Maintenance',
     'summary': 'Equipment and Maintenance Management System',
     'description': """
@@ -12,7 +12,7 @@
     
     Designed for Hackathon usage.
     """,
-    'depends': ['base'],
+    'depends': ['base', 'mail'],
     'data': [
         'security/ir.model.access.csv',
     ],
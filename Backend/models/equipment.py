@@ -3,6 +3,7 @@ from odoo import models, fields, api
 class Equipment(models.Model):
     _name = 'gear.equipment'
     _description = 'Maintenance Equipment'
+    _inherit = ['mail.thread']
 
     name = fields.Char(string='Equipment Name', required=True)
     serial_number = fields.Char(string='Serial Number')
@@ -18,11 +19,16 @@ class Equipment(models.Model):
     
     is_scrapped = fields.Boolean(string='Scrapped', default=False, readonly=True)
     
-    maintenance_count = fields.Integer(compute='_compute_maintenance_count', string='Maintenance Count')
+    maintenance_ids = fields.One2many('gear.maintenance.request', 'equipment_id', string='Maintenance Requests')
+    maintenance_count = fields.Integer(compute='_compute_maintenance_count', string='Maintenance Count', store=True)
 
-    @api.depends('name') # Dummy depend to ensure computation triggers if needed, though usually depends on relation
+    @api.depends('maintenance_ids')
     def _compute_maintenance_count(self):
+        # One grouped read for the whole recordset instead of a search_count per equipment
+        # (Odoo 17 _read_group: one (equipment, count) tuple per group)
+        groups = self.env['gear.maintenance.request']._read_group(
+            [('equipment_id', 'in', self._origin.ids)], ['equipment_id'], ['__count']
+        )
+        counts = {equipment.id: count for equipment, count in groups}
         for equipment in self:
-            equipment.maintenance_count = self.env['gear.maintenance.request'].search_count([
-                ('equipment_id', '=', equipment.id)
-            ])
+            equipment.maintenance_count = counts.get(equipment._origin.id, 0)
@@ -41,9 +41,12 @@ class MaintenanceRequest(models.Model):
     # ---------------------------------------------------------
     @api.constrains('technician_id', 'maintenance_team_id')
     def _check_technician_team(self):
+        # Read every team's members once (prefetched across the recordset), then check by id
+        teams = self.mapped('maintenance_team_id')
+        members = {team.id: set(team.member_ids.ids) for team in teams}
         for request in self:
             if request.technician_id and request.maintenance_team_id:
-                if request.technician_id not in request.maintenance_team_id.member_ids:
+                if request.technician_id.id not in members[request.maintenance_team_id.id]:
                     raise exceptions.ValidationError(_("The assigned technician must be a member of the selected Maintenance Team."))
 
     @api.constrains('request_type', 'scheduled_date')
@@ -55,15 +58,25 @@ class MaintenanceRequest(models.Model):
     # ---------------------------------------------------------
     # Business Logic: Workflow Actions
     # ---------------------------------------------------------
+    # Each action writes the whole recordset at once; records already in the target state are
+    # skipped so mass actions don't rewrite (and re-track) them.
     def action_in_progress(self):
-        self.write({'state': 'in_progress'})
+        self.filtered(lambda r: r.state != 'in_progress').write({'state': 'in_progress'})
 
     def action_repaired(self):
-        self.write({'state': 'repaired'})
+        self.filtered(lambda r: r.state != 'repaired').write({'state': 'repaired'})
 
     def action_scrap(self):
-        self.write({'state': 'scrap'})
-        # Auto-scrap equipment
-        if self.equipment_id:
-            self.equipment_id.write({'is_scrapped': True})
-            self.equipment_id.message_post(body=_("Equipment scrapped via Maintenance Request: %s") % self.name)
+        requests = self.filtered(lambda r: r.state != 'scrap')
+        requests.write({'state': 'scrap'})
+        # Auto-scrap equipment: one write for all of it, then one note per equipment
+        names = {}
+        for request in requests:
+            if not request.equipment_id.is_scrapped:
+                names.setdefault(request.equipment_id.id, []).append(request.name)
+        if not names:
+            return
+        equipment = self.env['gear.equipment'].browse(list(names))
+        equipment.write({'is_scrapped': True})
+        for record in equipment:
+            record.message_post(body=_("Equipment scrapped via Maintenance Request: %s") % ", ".join(names[record.id]))
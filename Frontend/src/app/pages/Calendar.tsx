@@ -13,26 +13,34 @@ const MONTHS = [
 
 const DAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'];
 
+// Local YYYY-MM-DD, the form the calendar endpoint takes and returns
+const toDateKey = (date: Date) =>
+  `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-${String(date.getDate()).padStart(2, '0')}`;
+
 export function Calendar() {
   const [currentDate, setCurrentDate] = useState(new Date());
   const [view, setView] = useState<'month' | 'week'>('month');
   const [showScheduleDialog, setShowScheduleDialog] = useState(false);
   const [selectedDate, setSelectedDate] = useState<string>('');
 
-  const [equipment, setEquipment] = useState<any[]>([]);
-  const [requests, setRequests] = useState<any[]>([]);
+  const [days, setDays] = useState<Record<string, { preventive: any[]; corrective: any[] }>>({});
+  const [upcomingMaintenance, setUpcoming] = useState<any[]>([]);
+
+  const year = currentDate.getFullYear();
+  const month = currentDate.getMonth();
 
+  // The server buckets the visible 42-day grid by day and type; refetched when the month changes
   useEffect(() => {
-    Promise.all([api.fetchEquipment(), api.fetchRequests()])
-      .then(([eq, req]) => {
-        setEquipment(eq);
-        setRequests(req);
+    const firstDay = new Date(year, month, 1);
+    const start = new Date(year, month, 1 - firstDay.getDay());
+    const end = new Date(year, month, 1 - firstDay.getDay() + 41);
+    api.fetchCalendar({ start: toDateKey(start), end: toDateKey(end) })
+      .then(calendar => {
+        setDays(Object.fromEntries(calendar.days.map((d: any) => [d.day, d])));
+        setUpcoming(calendar.upcoming.slice(0, 5));
       })
       .catch(err => console.error("Failed to load calendar data", err));
-  }, []);
-
-  const year = currentDate.getFullYear();
-  const month = currentDate.getMonth();
+  }, [year, month]);
 
   // Get first day of month and total days
   const firstDayOfMonth = new Date(year, month, 1).getDay();
@@ -84,24 +92,8 @@ export function Calendar() {
 
   // Get maintenance for a specific date
   const getMaintenanceForDate = (date: Date) => {
-    const dateStr = date.toISOString().split('T')[0];
-
-    // Filter reqs
-    const dailyRequests = requests.filter(r => {
-      if (!r.scheduled_date) return false;
-      return r.scheduled_date.startsWith(dateStr);
-    });
-
-    const preventive = dailyRequests.filter(r => r.req_type === 'Preventive');
-    const regular = dailyRequests.filter(r => r.req_type === 'Corrective'); // Or others
-
-    // Enrich with names
-    const enrich = (list: any[]) => list.map(r => ({
-      ...r,
-      equipmentName: equipment.find(e => e.id === r.equipment_id)?.name || 'Unknown'
-    }));
-
-    return { preventive: enrich(preventive), regular: enrich(regular) };
+    const day = days[toDateKey(date)];
+    return { preventive: day?.preventive ?? [], regular: day?.corrective ?? [] };
   };
 
   const isToday = (date: Date) => {
@@ -109,15 +101,6 @@ export function Calendar() {
     return date.toDateString() === today.toDateString();
   };
 
-  const upcomingMaintenance = requests
-    .filter(r => new Date(r.scheduled_date) >= new Date() && r.stage !== 'Repaired' && r.stage !== 'Scrap')
-    .sort((a, b) => new Date(a.scheduled_date).getTime() - new Date(b.scheduled_date).getTime())
-    .slice(0, 5)
-    .map(r => ({
-      ...r,
-      equipmentName: equipment.find(e => e.id === r.equipment_id)?.name
-    }));
-
   return (
     <div className="p-4 lg:p-8 space-y-6">
       {/* Header */}
@@ -214,7 +197,7 @@ export function Calendar() {
                         >
                           <div className="flex items-center gap-1">
                             <CalendarIcon className="w-3 h-3 flex-shrink-0" />
-                            <span className="truncate">{pm.equipmentName}</span>
+                            <span className="truncate">{pm.equipment_name || 'Unknown'}</span>
                           </div>
                         </div>
                       ))}
@@ -227,7 +210,7 @@ export function Calendar() {
                         >
                           <div className="flex items-center gap-1">
                             <Wrench className="w-3 h-3 flex-shrink-0" />
-                            <span className="truncate">{mr.equipmentName}</span>
+                            <span className="truncate">{mr.equipment_name || 'Unknown'}</span>
                           </div>
                         </div>
                       ))}
@@ -268,7 +251,7 @@ export function Calendar() {
                         {req.req_type}
                       </Badge>
                     </div>
-                    <p className="text-sm text-gray-600 mb-2">{req.equipmentName}</p>
+                    <p className="text-sm text-gray-600 mb-2">{req.equipment_name}</p>
                     <div className="flex items-center gap-4 text-xs text-gray-500">
                       <span className="flex items-center gap-1">
                         <CalendarIcon className="w-3 h-3" />
@@ -5,19 +5,28 @@ import { api } from '../../services/api';
 import { Link } from 'react-router-dom';
 
 export function Dashboard() {
-  const [equipmentList, setEquipmentList] = useState<any[]>([]);
-  const [requestList, setRequestList] = useState<any[]>([]);
+  const [totalEquipment, setTotalEquipment] = useState(0);
+  const [openRequests, setOpenRequests] = useState(0);
+  const [recentActivities, setRecentActivities] = useState<any[]>([]);
+  const [overdueRequests, setOverdueRequests] = useState(0);
+  const [preventiveToday, setPreventiveToday] = useState(0);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     async function loadData() {
       try {
-        const [eq, req] = await Promise.all([
-          api.fetchEquipment(),
-          api.fetchRequests()
+        // Totals are counted server-side; limit=1 on the due lists since only their totals are shown
+        const [summary, recent, overdue, dueToday] = await Promise.all([
+          api.fetchReportSummary(),
+          api.fetchRequests({ limit: 5 }),
+          api.fetchDueRequests('overdue', { limit: 1 }),
+          api.fetchDueRequests('due-today', { req_type: 'Preventive', limit: 1 })
         ]);
-        setEquipmentList(eq);
-        setRequestList(req);
+        setTotalEquipment(summary.total_equipment);
+        setOpenRequests(summary.open_requests);
+        setRecentActivities(recent.items);
+        setOverdueRequests(overdue.total);
+        setPreventiveToday(dueToday.total);
       } catch (err) {
         console.error("Failed to load dashboard data", err);
       } finally {
@@ -29,16 +38,6 @@ export function Dashboard() {
 
   if (loading) return <div className="p-8">Loading Dashboard...</div>;
 
-  const totalEquipment = equipmentList.length;
-  // Backend uses 'state' instead of 'status'
-  const openRequests = requestList.filter((r: any) => r.state !== 'repaired' && r.state !== 'scrap').length;
-  const overdueRequests = requestList.filter((r: any) => {
-    if(!r.scheduled_date) return false;
-    const dueDate = new Date(r.scheduled_date);
-    return dueDate < new Date() && r.state !== 'repaired' && r.state !== 'scrap';
-  }).length;
-  const preventiveToday = 0; // Backend doesn't support 'today' filter yet easily
-
   const stats = [
     {
       title: 'Total Equipment',
@@ -70,8 +69,6 @@ export function Dashboard() {
     },
   ];
 
-  const recentActivities = requestList.slice(0, 5);
-
   return (
     <div className="p-4 lg:p-8 space-y-6">
       {/* Header */}
@@ -28,6 +28,10 @@ const statusColumns = [
   { id: 'Scrap', title: 'Scrap', color: 'bg-red-100 border-red-300' },
 ] as const;
 
+// One server-filtered page list per column; nextCursor is null once the column is fully loaded
+type ColumnState = { items: any[]; nextCursor: string | null };
+const EMPTY_COLUMN: ColumnState = { items: [], nextCursor: null };
+
 interface DraggableCardProps {
   request: any;
 }
@@ -84,10 +88,12 @@ function DraggableCard({ request }: DraggableCardProps) {
 interface DroppableColumnProps {
   status: typeof statusColumns[number];
   requests: any[];
+  hasMore: boolean;
   onMove: (id: string, newStatus: string) => void;
+  onLoadMore: () => void;
 }
 
-function DroppableColumn({ status, requests, onMove }: DroppableColumnProps) {
+function DroppableColumn({ status, requests, hasMore, onMove, onLoadMore }: DroppableColumnProps) {
   const [{ isOver }, drop] = useDrop({
     accept: ITEM_TYPE,
     drop: (item: { id: string; status: string }) => {
@@ -119,6 +125,12 @@ function DroppableColumn({ status, requests, onMove }: DroppableColumnProps) {
             </div>
           ))}
 
+          {hasMore && (
+            <Button variant="ghost" className="w-full" onClick={onLoadMore}>
+              Load more
+            </Button>
+          )}
+
           {requests.length === 0 && (
             <div className={`p-8 text-center text-gray-400 border-2 border-dashed rounded-lg ${isOver ? 'border-gray-400 bg-white' : 'border-gray-200'
               }`}>
@@ -132,20 +144,46 @@ function DroppableColumn({ status, requests, onMove }: DroppableColumnProps) {
 }
 
 export function Maintenance() {
-  const [requests, setRequests] = useState<any[]>([]);
+  const [columns, setColumns] = useState<Record<string, ColumnState>>({});
   const [showScrapDialog, setShowScrapDialog] = useState(false);
   const [pendingMove, setPendingMove] = useState<{ id: string; newStatus: string } | null>(null);
   const [showNewRequestDialog, setShowNewRequestDialog] = useState(false);
 
-  const loadRequests = async () => {
+  // Each column asks the server for its own stage, a page at a time
+  const loadColumn = async (stage: string, cursor?: string) => {
     try {
-      const data = await api.fetchRequests();
-      setRequests(data);
+      const page = await api.fetchRequests(cursor ? { stage, cursor } : { stage });
+      setColumns(prev => ({
+        ...prev,
+        [stage]: {
+          items: cursor ? [...(prev[stage]?.items ?? []), ...page.items] : page.items,
+          nextCursor: page.nextCursor,
+        },
+      }));
     } catch (e) {
       console.error(e);
     }
   };
 
+  const loadRequests = () => Promise.all(statusColumns.map(column => loadColumn(column.id)));
+
+  const columnState = (stage: string) => columns[stage] ?? EMPTY_COLUMN;
+
+  // Optimistic move: take the card out of whichever column holds it and put it on top of the new one
+  const moveCard = (id: string, newStatus: string) => {
+    setColumns(prev => {
+      const moved = Object.values(prev).flatMap(col => col.items).find(req => req.id === id);
+      if (!moved) return prev;
+      const next: Record<string, ColumnState> = {};
+      for (const [stage, col] of Object.entries(prev)) {
+        next[stage] = { ...col, items: col.items.filter(req => req.id !== id) };
+      }
+      const target = next[newStatus] ?? EMPTY_COLUMN;
+      next[newStatus] = { ...target, items: [{ ...moved, stage: newStatus }, ...target.items] };
+      return next;
+    });
+  };
+
   useEffect(() => {
     loadRequests();
   }, []);
@@ -156,9 +194,7 @@ export function Maintenance() {
       setShowScrapDialog(true);
     } else {
       // Optimistic update
-      setRequests(prev =>
-        prev.map(req => req.id === id ? { ...req, stage: newStatus } : req)
-      );
+      moveCard(id, newStatus);
       // API call
       try {
         await api.updateRequestStage(id, newStatus);
@@ -173,9 +209,7 @@ export function Maintenance() {
     if (pendingMove) {
       const { id } = pendingMove;
       // Optimistic
-      setRequests(prev =>
-        prev.map(req => req.id === id ? { ...req, stage: 'Scrap' } : req)
-      );
+      moveCard(id, 'Scrap');
       try {
         await api.updateRequestStage(id, 'Scrap');
       } catch (err) {
@@ -212,8 +246,10 @@ export function Maintenance() {
             <DroppableColumn
               key={column.id}
               status={column}
-              requests={requests.filter(r => (r.stage || 'New') === column.id)}
+              requests={columnState(column.id).items}
+              hasMore={columnState(column.id).nextCursor !== null}
               onMove={handleMove}
+              onLoadMore={() => loadColumn(column.id, columnState(column.id).nextCursor ?? undefined)}
             />
           ))}
         </div>
@@ -221,7 +257,7 @@ export function Maintenance() {
         {/* Mobile: List View */}
         <div className="lg:hidden space-y-4">
           {statusColumns.map((column) => {
-            const columnRequests = requests.filter(r => (r.stage || 'New') === column.id);
+            const { items: columnRequests, nextCursor } = columnState(column.id);
             if (columnRequests.length === 0) return null;
 
             return (
@@ -240,6 +276,11 @@ export function Maintenance() {
                       <DraggableCard request={request} />
                     </div>
                   ))}
+                  {nextCursor && (
+                    <Button variant="ghost" className="w-full" onClick={() => loadColumn(column.id, nextCursor)}>
+                      Load more
+                    </Button>
+                  )}
                 </CardContent>
               </Card>
             );
@@ -44,14 +44,18 @@ const PRIORITY_COLORS = {
 export function Reports() {
   const [dateRange, setDateRange] = useState('last-30-days');
   const [equipment, setEquipment] = useState<any[]>([]);
-  const [maintenanceRequests, setRequests] = useState<any[]>([]);
+  const [summary, setSummary] = useState<any>(null);
+  const [reliability, setReliability] = useState<any[]>([]);
 
   useEffect(() => {
-    Promise.all([api.fetchEquipment(), api.fetchRequests()])
-      .then(([eqData, reqData]) => {
+    // Request counts come from the server-side counters; top_equipment is sized to cover every asset
+    Promise.all([api.fetchEquipment(), api.fetchReliability('equipment', 5)])
+      .then(([eqData, reliabilityData]) => {
         setEquipment(eqData);
-        setRequests(reqData);
+        setReliability(reliabilityData);
+        return api.fetchReportSummary(Math.max(eqData.length, 1));
       })
+      .then(setSummary)
       .catch(err => console.error("Failed to load report data", err));
   }, []);
 
@@ -59,23 +63,28 @@ export function Reports() {
   const totalEquipment = equipment.length;
   // Note: Backend uses 'Active', 'Maintenance', 'Scrapped'
   const activeEquipment = equipment.filter(e => e.status === 'Active').length;
-  const totalRequests = maintenanceRequests.length;
-  const completedRequests = maintenanceRequests.filter(r => r.stage === 'Repaired').length;
+  const totalRequests = summary?.total_requests ?? 0;
+  const completedRequests = summary?.completed_requests ?? 0;
+  const byStage = summary?.by_stage ?? {};
+  const byPriority = summary?.by_priority ?? {};
+  const requestsByEquipment: Record<number, number> = Object.fromEntries(
+    (summary?.top_equipment ?? []).map((row: any) => [row.equipment_id, row.request_count])
+  );
 
   // Status distribution data (Dynamic)
   const statusData = [
-    { name: 'New', value: maintenanceRequests.filter(r => r.stage === 'New').length, color: STATUS_COLORS['New'] },
-    { name: 'In Progress', value: maintenanceRequests.filter(r => r.stage === 'In Progress').length, color: STATUS_COLORS['In Progress'] },
-    { name: 'Repaired', value: maintenanceRequests.filter(r => r.stage === 'Repaired').length, color: STATUS_COLORS['Repaired'] },
-    { name: 'Scrap', value: maintenanceRequests.filter(r => r.stage === 'Scrap').length, color: STATUS_COLORS['Scrap'] },
+    { name: 'New', value: byStage['New'] ?? 0, color: STATUS_COLORS['New'] },
+    { name: 'In Progress', value: byStage['In Progress'] ?? 0, color: STATUS_COLORS['In Progress'] },
+    { name: 'Repaired', value: byStage['Repaired'] ?? 0, color: STATUS_COLORS['Repaired'] },
+    { name: 'Scrap', value: byStage['Scrap'] ?? 0, color: STATUS_COLORS['Scrap'] },
   ].filter(d => d.value > 0);
 
   // Priority distribution
   const priorityData = [
-    { name: 'Low', value: maintenanceRequests.filter(r => r.priority === 'Low').length, color: PRIORITY_COLORS['Low'] },
-    { name: 'Normal', value: maintenanceRequests.filter(r => r.priority === 'Normal').length, color: PRIORITY_COLORS['Normal'] },
-    { name: 'High', value: maintenanceRequests.filter(r => r.priority === 'High').length, color: PRIORITY_COLORS['High'] },
-    { name: 'Critical', value: maintenanceRequests.filter(r => r.priority === 'Critical').length, color: PRIORITY_COLORS['Critical'] },
+    { name: 'Low', value: byPriority['Low'] ?? 0, color: PRIORITY_COLORS['Low'] },
+    { name: 'Normal', value: byPriority['Normal'] ?? 0, color: PRIORITY_COLORS['Normal'] },
+    { name: 'High', value: byPriority['High'] ?? 0, color: PRIORITY_COLORS['High'] },
+    { name: 'Critical', value: byPriority['Critical'] ?? 0, color: PRIORITY_COLORS['Critical'] },
   ].filter(d => d.value > 0);
 
   // Equipment category distribution
@@ -99,11 +108,12 @@ export function Reports() {
     { month: 'Dec', requests: 20, completed: 12, cost: 7200 },
   ];
 
-  // Equipment-wise maintenance count
-  const equipmentMaintenanceData = equipment.map(eq => ({
-    name: eq.name,
-    requests: maintenanceRequests.filter(r => r.equipment_id === eq.id).length,
-  })).filter(item => item.requests > 0).slice(0, 5);
+  // Equipment-wise failures and mean time to repair, from the server-side reliability rollups
+  const equipmentMaintenanceData = reliability.map(row => ({
+    name: row.name,
+    failures: row.failures,
+    mttr: row.mttr_hours ?? 0,
+  }));
 
 
   return (
@@ -258,7 +268,7 @@ export function Reports() {
         {/* Equipment-wise Maintenance */}
         <Card>
           <CardHeader>
-            <CardTitle>Maintenance by Equipment (Top 5)</CardTitle>
+            <CardTitle>Failures by Equipment (Top 5)</CardTitle>
           </CardHeader>
           <CardContent>
             <ResponsiveContainer width="100%" height={300}>
@@ -267,7 +277,9 @@ export function Reports() {
                 <XAxis dataKey="name" angle={-45} textAnchor="end" height={100} />
                 <YAxis />
                 <Tooltip />
-                <Bar dataKey="requests" fill="#3b82f6" name="Requests" />
+                <Legend />
+                <Bar dataKey="failures" fill="#3b82f6" name="Failures" />
+                <Bar dataKey="mttr" fill="#f97316" name="MTTR (h)" />
               </BarChart>
             </ResponsiveContainer>
           </CardContent>
@@ -341,7 +353,7 @@ export function Reports() {
               </thead>
               <tbody>
                 {equipment.map((eq) => {
-                  const requestCount = maintenanceRequests.filter(r => r.equipment_id === eq.id).length;
+                  const requestCount = requestsByEquipment[eq.id] ?? 0;
                   return (
                     <tr key={eq.id} className="border-b hover:bg-gray-50">
                       <td className="p-3">
@@ -35,12 +35,38 @@ export const api = {
   },
 
   // Requests
-  fetchRequests: async () => {
-    const res = await fetch(`${API_URL}/requests/`);
+  // One page per call; filters are applied server-side. nextCursor (from the X-Next-Cursor header)
+  // is null on the last page, otherwise pass it back as `cursor` to fetch the next one.
+  fetchRequests: async (filters: Record<string, string | number> = {}) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => params.set(key, String(value)));
+    const res = await fetch(`${API_URL}/requests/?${params.toString()}`);
     if (!res.ok) throw new Error('Failed to fetch requests');
+    const items = await res.json();
+    return { items, nextCursor: res.headers.get('X-Next-Cursor') };
+  },
+
+  // Requests scheduled between start and end (YYYY-MM-DD, inclusive), bucketed per day and
+  // split into preventive/corrective, plus the next open requests from now on
+  fetchCalendar: async (filters: Record<string, string | number>) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => params.set(key, String(value)));
+    const res = await fetch(`${API_URL}/requests/calendar?${params.toString()}`);
+    if (!res.ok) throw new Error('Failed to fetch calendar');
     return res.json();
   },
 
+  // Open requests past their scheduled date / scheduled for today. Returns { items, total }:
+  // items holds up to `limit` rows (earliest first), total comes from the X-Total-Count header.
+  fetchDueRequests: async (due: 'overdue' | 'due-today', filters: Record<string, string | number> = {}) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => params.set(key, String(value)));
+    const res = await fetch(`${API_URL}/requests/${due}?${params.toString()}`);
+    if (!res.ok) throw new Error(`Failed to fetch ${due} requests`);
+    const items = await res.json();
+    return { items, total: Number(res.headers.get('X-Total-Count') ?? items.length) };
+  },
+
   createRequest: async (data: any) => {
     const res = await fetch(`${API_URL}/requests/`, {
       method: 'POST',
@@ -61,4 +87,39 @@ export const api = {
     if (!res.ok) throw new Error('Failed to update stage');
     return res.json();
   },
+
+  // Request and equipment totals from the server-side counters; top_equipment lists the
+  // `top` assets with the most requests
+  fetchReportSummary: async (top = 5) => {
+    const res = await fetch(`${API_URL}/reports/summary?top=${top}`);
+    if (!res.ok) throw new Error('Failed to fetch report summary');
+    return res.json();
+  },
+
+  // Reliability rollups (MTTR/MTBF) per equipment, category or team, most failures first
+  fetchReliability: async (scope: 'equipment' | 'category' | 'team' = 'equipment', limit = 100) => {
+    const res = await fetch(`${API_URL}/analytics/reliability?scope=${scope}&limit=${limit}`);
+    if (!res.ok) throw new Error('Failed to fetch reliability');
+    return res.json();
+  },
+
+  // Hours spent per stage (from the stage history), optionally split by team or technician
+  fetchCycleTimes: async (filters: Record<string, string | number> = {}) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => params.set(key, String(value)));
+    const res = await fetch(`${API_URL}/analytics/cycle-time?${params.toString()}`);
+    if (!res.ok) throw new Error('Failed to fetch cycle times');
+    return res.json();
+  },
+
+  // Live board updates (Server-Sent Events). Returns the EventSource; call .close() to stop.
+  subscribeEvents: (filters: Record<string, string | number>, onEvent: (event: any) => void) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => params.set(key, String(value)));
+    const source = new EventSource(`${API_URL}/events?${params.toString()}`);
+    ['request.created', 'request.stage_changed', 'request.overdue', 'requests.imported', 'resync'].forEach(type =>
+      source.addEventListener(type, (e: MessageEvent) => onEvent(JSON.parse(e.data)))
+    );
+    return source;
+  },
 };
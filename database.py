@@ -1,34 +1,197 @@
+import atexit
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import RealDictCursor, execute_batch
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 pool with health-checking on checkout and per-connection prepared statements."""
+
+    def __init__(self, dsn=None, minconn=None, maxconn=None, health_check_interval=None):
+        self.dsn = dsn or Config.DATABASE_URL
+        self.health_check_interval = (
+            Config.DB_HEALTH_CHECK_INTERVAL if health_check_interval is None else health_check_interval
+        )
+        maxconn = maxconn or Config.DB_POOL_MAX
+        minconn = min(minconn or Config.DB_POOL_MIN, maxconn)
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, self.dsn)
+        # psycopg2 reads minconn twice: connections opened up front, and idle ones putconn keeps
+        # (it closes the rest). Only the first should be small, so keep up to maxconn warm.
+        self._pool.minconn = maxconn
+        self._lock = threading.Lock()
+        # Per-connection state lives and dies with the connection object: psycopg2 closes surplus
+        # connections on putconn without telling us, and a recycled id() must not inherit it
+        self._last_used = weakref.WeakKeyDictionary()  # conn -> monotonic time it was returned to the pool
+        self._prepared = weakref.WeakKeyDictionary()   # conn -> names already PREPAREd on that connection
+        self._statements = {}     # name -> SQL registered through prepare()
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        with self._lock:
+            idle = time.monotonic() - self._last_used.get(conn, 0)
+        if idle < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._last_used.pop(conn, None)
+            self._prepared.pop(conn, None)
+        self._pool.putconn(conn, close=True)
+
+    def getconn(self):
+        # A pool slot is freed by each discard, so this loop is bounded by maxconn
+        while True:
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            logger.warning('Discarding broken database connection')
+            self._discard(conn)
+
+    def putconn(self, conn):
+        if conn.closed:
+            self._discard(conn)
+            return
+        with self._lock:
+            self._last_used[conn] = time.monotonic()
+        self._pool.putconn(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Yield a dict cursor; commit when the block exits, roll back if it raises."""
+        with self.connection() as conn:
+            try:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    yield cur
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                logger.error('Database error: %s', e)
+                raise
+            except Exception:
+                conn.rollback()
+                raise
+
+    def prepare(self, name, query):
+        """Register a statement; it is PREPAREd lazily, once per pooled connection."""
+        with self._lock:
+            self._statements[name] = query
+
+    def ensure_prepared(self, cur, name):
+        with self._lock:
+            done = self._prepared.setdefault(cur.connection, set())
+            if name in done:
+                return
+            query = self._statements[name]
+        cur.execute(f'PREPARE {name} AS {query}')
+        with self._lock:
+            done.add(name)
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+                atexit.register(_pool.closeall)
+    return _pool
+
+
 def get_db_connection():
-    """Create and return a database connection"""
+    """Create and return a dedicated (unpooled) database connection"""
     try:
         conn = psycopg2.connect(Config.DATABASE_URL)
         return conn
     except psycopg2.Error as e:
-        print(f"Error connecting to database: {e}")
+        logger.error('Error connecting to database: %s', e)
         raise
 
+
+def _fetch(cur, fetch_one, fetch_all):
+    if fetch_one:
+        return cur.fetchone()
+    if fetch_all:
+        return cur.fetchall()
+    return None
+
+
 def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-    """Execute a database query and return results"""
-    conn = get_db_connection()
+    """Execute a database query on a pooled connection and return results"""
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with get_pool().transaction() as cur:
             cur.execute(query, params)
-            if fetch_one:
-                result = cur.fetchone()
-            elif fetch_all:
-                result = cur.fetchall()
-            else:
-                result = None
-            conn.commit()
-            return result
-    except psycopg2.Error as e:
-        conn.rollback()
-        print(f"Database error: {e}")
+            return _fetch(cur, fetch_one, fetch_all)
+    except psycopg2.Error:
+        logger.error('Failed statement: %s', query)
         raise
-    finally:
-        conn.close()
 
+
+def execute_many(query, params_list, page_size=100):
+    """Run one statement for every parameter set, batched over a single connection and transaction"""
+    try:
+        with get_pool().transaction() as cur:
+            execute_batch(cur, query, params_list, page_size=page_size)
+            return cur.rowcount
+    except psycopg2.Error:
+        logger.error('Failed statement: %s', query)
+        raise
+
+
+def prepare(name, query):
+    """Register a named statement (using $1, $2 ... placeholders) for execute_prepared"""
+    get_pool().prepare(name, query)
+
+
+def execute_prepared(name, params=(), fetch_one=False, fetch_all=False):
+    """Execute a statement registered with prepare(), reusing its server-side plan"""
+    pool = get_pool()
+    placeholders = ', '.join(['%s'] * len(params))
+    statement = f'EXECUTE {name} ({placeholders})' if params else f'EXECUTE {name}'
+    try:
+        with pool.transaction() as cur:
+            pool.ensure_prepared(cur, name)
+            cur.execute(statement, params)
+            return _fetch(cur, fetch_one, fetch_all)
+    except psycopg2.Error:
+        logger.error('Failed statement: %s', statement)
+        raise
+
+
+@contextmanager
+def transaction():
+    """Run several statements over one pooled connection as a single transaction"""
+    with get_pool().transaction() as cur:
+        yield cur
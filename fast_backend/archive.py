@@ -0,0 +1,121 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.orm import Session
+from models import ArchivedRequest, MaintenanceRequest, RequestStage
+import events
+
+logger = logging.getLogger(__name__)
+
+# Closed requests older than this move to maintenance_requests_archive, BATCH_SIZE rows per
+# transaction (each one holds the write lock while it deletes index and FTS entries, so keep it small)
+AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+# Seconds between background runs (0 disables the background loop)
+RUN_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_RUN_INTERVAL", "3600"))
+
+CLOSED_STAGES = (RequestStage.repaired, RequestStage.scrap)
+
+# --- Moving rows ---
+
+def _next_batch(db: Session, stage: RequestStage, after_id: int, below_id: int, cutoff: datetime, size: int) -> list:
+    # Walks ix_requests_stage_id in id order; close_date is only missing on rows closed before it existed
+    r = MaintenanceRequest
+    return list(db.scalars(
+        select(r.id)
+        .where(r.stage == stage, r.id > after_id, r.id < below_id, func.coalesce(r.close_date, r.created_at) < cutoff)
+        .order_by(r.id)
+        .limit(size)
+    ))
+
+def _move(db: Session, stage: RequestStage, first_id: int, last_id: int, cutoff: datetime, archived_at: datetime) -> int:
+    """Move one batch in one transaction: DELETE ... RETURNING hands over exactly the rows removed.
+
+    The batch is the id range it was picked from, with the predicate checked again by the DELETE,
+    so a request reopened since it was picked stays hot (and no IN list grows with the batch).
+    """
+    hot = MaintenanceRequest.__table__
+    rows = db.execute(
+        delete(hot)
+        .where(
+            hot.c.stage == stage, hot.c.id >= first_id, hot.c.id <= last_id,
+            func.coalesce(hot.c.close_date, hot.c.created_at) < cutoff,
+        )
+        .returning(*hot.c)
+    ).mappings().all()
+    if rows:
+        db.execute(insert(ArchivedRequest.__table__), [{**row, "archived_at": archived_at} for row in rows])
+        events.publish_on_commit(db, {"type": "requests.archived", "count": len(rows)})
+    db.commit()
+    return len(rows)
+
+def archive_closed(db: Session, older_than_days: int = AFTER_DAYS, batch_size: int = BATCH_SIZE,
+                   now: Optional[datetime] = None) -> dict:
+    """Move Repaired/Scrap requests closed more than `older_than_days` ago into the archive.
+
+    Every batch commits on its own, so a run can stop anywhere (crash, shutdown) and the next one
+    picks up whatever is still in the hot table. Counters and reliability rollups keep counting
+    archived rows, so nothing else changes.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+    # The newest row stays hot: SQLite hands out max(id) + 1, so archiving it would let the next
+    # insert reuse an id the archive already holds
+    below_id = db.scalar(select(func.max(MaintenanceRequest.id))) or 0
+    archived = batches = 0
+    for stage in CLOSED_STAGES:
+        after_id = 0
+        while True:
+            ids = _next_batch(db, stage, after_id, below_id, cutoff, batch_size)
+            if not ids:
+                break
+            archived += _move(db, stage, ids[0], ids[-1], cutoff, now)
+            batches += 1
+            after_id = ids[-1]
+    db.commit()
+    if archived:
+        logger.info("Archived %d closed requests in %d batches", archived, batches)
+    return {"archived": archived, "batches": batches, "cutoff": cutoff}
+
+def run_once(session_factory, older_than_days: int = AFTER_DAYS) -> dict:
+    db = session_factory()
+    try:
+        return archive_closed(db, older_than_days)
+    finally:
+        db.close()
+
+# --- Reading ---
+
+def reaches(db: Session, **ranges) -> bool:
+    """Whether date ranges like created_at=(from, to) can match archived rows.
+
+    Only a list filtered by date reads the archive, and only when each asked range overlaps it
+    (filters are ANDed, so one empty range rules the archive out). Each check is a single probe
+    of the archive's (column, id) index.
+    """
+    asked = {name: bounds for name, bounds in ranges.items() if any(bound is not None for bound in bounds)}
+    if not asked:
+        return False
+    for name, (low, high) in asked.items():
+        column = getattr(ArchivedRequest, name)
+        query = select(ArchivedRequest.id)
+        if low is not None:
+            query = query.where(column >= low)
+        if high is not None:
+            query = query.where(column < high)
+        if db.execute(query.limit(1)).first() is None:
+            return False
+    return True
+
+def archived_ids(db: Session, ids: list) -> set:
+    return set(db.scalars(select(ArchivedRequest.id).where(ArchivedRequest.id.in_(ids)))) if ids else set()
+
+def history(*names: str):
+    """Hot and archived requests as one row source (UNION ALL of the named columns), for rebuilds."""
+    hot, cold = MaintenanceRequest.__table__, ArchivedRequest.__table__
+    return union_all(
+        select(*(hot.c[name] for name in names)),
+        select(*(cold.c[name] for name in names)),
+    ).subquery("requests")
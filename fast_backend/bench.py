@@ -0,0 +1,387 @@
+"""Latency and throughput benchmarks for Service methods and the HTTP routes.
+
+Fill a scratch database first, then point both scripts at it:
+
+    DATABASE_URL=sqlite:///./bench.db python seed.py --scale --equipment 100000 --requests 1000000
+    DATABASE_URL=sqlite:///./bench.db python bench.py --out after.json
+    python bench.py --compare before.json after.json
+
+HTTP cases go through the real app in-process (httpx ASGITransport, startup/shutdown hooks
+included), so they measure routing, validation and serialization without socket noise.
+Write cases modify the database; pass --read-only to skip them. The serialization suite runs
+the same rows through the response_model path and the plain-row path side by side. The
+coldstart suite (not part of "all") times real server processes from launch to first response.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import date, datetime, timedelta
+from typing import List
+
+import httpx
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+
+import fastjson
+import schemas
+from database import SessionLocal, engine
+from models import Equipment, EquipmentStatus, MaintenanceRequest, MaintenanceTeam, RequestStage
+from services import MAX_PAGE_SIZE, Service
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is reported as null
+    resource = None
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+def summarize(kind: str, latencies_ns: list, wall_s: float, errors: int) -> dict:
+    ms = sorted(value / 1e6 for value in latencies_ns)
+    return {
+        "kind": kind,
+        "iterations": len(ms),
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+        "throughput_rps": round(len(ms) / wall_s, 1) if wall_s else 0.0,
+        # Process-wide high-water mark after this case (cases run in order, so it only grows)
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+# --- Fixture data sampled from whatever the database holds ---
+
+class Sample:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        with SessionLocal() as db:
+            self.team_ids = list(db.scalars(select(MaintenanceTeam.id)))
+            self.equipment_ids = list(db.scalars(
+                select(Equipment.id).where(Equipment.status != EquipmentStatus.scrapped).limit(10_000)
+            ))
+            self.open_request_ids = list(db.scalars(
+                select(MaintenanceRequest.id)
+                .where(MaintenanceRequest.stage.in_([RequestStage.new, RequestStage.in_progress]))
+                .limit(10_000)
+            ))
+            self.max_request_id = db.scalar(select(func.max(MaintenanceRequest.id))) or 0
+            self.counts = {
+                "teams": len(self.team_ids),
+                "equipment": db.scalar(select(func.count(Equipment.id))),
+                "requests": db.scalar(select(func.count(MaintenanceRequest.id))),
+            }
+        if not (self.team_ids and self.equipment_ids and self.open_request_ids):
+            raise SystemExit("Benchmark database is empty; run `python seed.py --scale` first")
+        # change_stage cases flip open requests between New and In Progress
+        self.toggle = {}
+
+    def team(self):
+        return self.rng.choice(self.team_ids)
+
+    def equipment(self):
+        return self.rng.choice(self.equipment_ids)
+
+    def cursor(self):
+        return self.rng.randint(0, self.max_request_id)
+
+    def full_page_cursor(self):
+        # Far enough from the end that a MAX_PAGE_SIZE page is (nearly always) full
+        return self.rng.randint(0, max(0, self.max_request_id - 2 * MAX_PAGE_SIZE))
+
+    def month(self):
+        start = date.today() - timedelta(days=self.rng.randint(0, 365))
+        return start, start + timedelta(days=41)
+
+    def new_request(self) -> dict:
+        return {"subject": "Benchmark request", "req_type": "Corrective", "equipment_id": self.equipment(), "duration_hours": 1.0}
+
+    def next_stage(self):
+        req_id = self.rng.choice(self.open_request_ids)
+        stage = self.toggle.get(req_id, RequestStage.new)
+        stage = RequestStage.in_progress if stage == RequestStage.new else RequestStage.new
+        self.toggle[req_id] = stage
+        return req_id, stage
+
+# --- Cases: (name, callable, writes, max_iterations) ---
+# max_iterations caps the cases whose cost grows with table size (full lists)
+
+def call(fn):
+    def run():
+        with SessionLocal() as db:
+            fn(db)
+    return run
+
+def service_cases(s: Sample):
+    return [
+        ("Service.get_teams", call(Service.get_teams), False, None),
+        ("Service.get_equipment", call(Service.get_equipment), False, 5),
+        ("Service.get_equipment_item", call(lambda db: Service.get_equipment_item(db, s.equipment())), False, None),
+        ("Service.get_requests first page", call(lambda db: Service.get_requests(db)), False, None),
+        ("Service.get_requests deep page", call(lambda db: Service.get_requests(db, cursor=s.cursor())), False, None),
+        ("Service.get_requests by team", call(lambda db: Service.get_requests(db, team_id=s.team())), False, None),
+        ("Service.get_requests open stage", call(lambda db: Service.get_requests(db, stage=schemas.RequestStage.new)), False, None),
+        ("Service.get_calendar", call(lambda db: Service.get_calendar(db, *s.month(), team_id=s.team())), False, None),
+        ("Service.get_report_summary", call(Service.get_report_summary), False, None),
+        ("Service.create_request", call(lambda db: Service.create_request(db, schemas.MaintenanceRequestCreate(**s.new_request()))), True, None),
+        ("Service.change_stage", call(lambda db: Service.change_stage(db, *s.next_stage())), True, None),
+    ]
+
+def response_model_json(schema):
+    """The response_model=List[schema] path: validate from attributes, dump in JSON mode, json.dumps."""
+    adapter = TypeAdapter(List[schema])
+
+    def encode(rows):
+        content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return encode
+
+def serialization_cases(s: Sample):
+    """The same rows through the response_model path and the plain-row path, query included."""
+    requests_json = response_model_json(schemas.MaintenanceRequest)
+    equipment_json = response_model_json(schemas.Equipment)
+    teams_json = response_model_json(schemas.MaintenanceTeam)
+
+    def page(db, plain):
+        return Service.get_requests(db, cursor=s.full_page_cursor(), limit=MAX_PAGE_SIZE, plain=plain)[0]
+
+    return [
+        ("requests page: response_model", call(lambda db: requests_json(page(db, False))), False, None),
+        ("requests page: rows + fastjson", call(lambda db: fastjson.dumps(page(db, True))), False, None),
+        ("equipment list: response_model", call(lambda db: equipment_json(Service.get_equipment(db))), False, 5),
+        ("equipment list: rows + fastjson", call(lambda db: fastjson.dumps(Service.get_equipment(db, plain=True))), False, 5),
+        ("teams list: response_model", call(lambda db: teams_json(Service.get_teams(db))), False, None),
+        ("teams list: rows + fastjson", call(lambda db: fastjson.dumps(Service.get_teams(db, plain=True))), False, None),
+    ]
+
+def http_cases(s: Sample):
+    def get(path, params=None):
+        return lambda client: client.get(path, params=params() if callable(params) else params)
+
+    def calendar_params():
+        start, end = s.month()
+        return {"start": start.isoformat(), "end": end.isoformat(), "team_id": s.team()}
+
+    def change_stage(client):
+        req_id, stage = s.next_stage()
+        return client.put(f"/requests/{req_id}/stage", params={"stage": stage.value})
+
+    return [
+        ("GET /health", get("/health"), False, None),
+        ("GET /teams/", get("/teams/"), False, None),
+        ("GET /equipment/", get("/equipment/"), False, 5),
+        ("GET /equipment/?expand=team,technician", get("/equipment/", {"expand": "team,technician"}), False, 5),
+        ("GET /equipment/{id}", lambda client: client.get(f"/equipment/{s.equipment()}"), False, None),
+        ("GET /requests/", get("/requests/"), False, None),
+        ("GET /requests/?limit=max", get("/requests/", lambda: {"cursor": s.full_page_cursor(), "limit": MAX_PAGE_SIZE}), False, None),
+        ("GET /requests/?cursor=", get("/requests/", lambda: {"cursor": s.cursor()}), False, None),
+        ("GET /requests/?team_id=", get("/requests/", lambda: {"team_id": s.team()}), False, None),
+        ("GET /requests/?expand=all", get("/requests/", {"expand": "equipment,team,technician,created_by"}), False, None),
+        ("GET /requests/calendar", get("/requests/calendar", calendar_params), False, None),
+        ("GET /reports/summary", get("/reports/summary"), False, None),
+        ("POST /requests/", lambda client: client.post("/requests/", json=s.new_request()), True, None),
+        ("PUT /requests/{id}/stage", change_stage, True, None),
+    ]
+
+# --- Runners ---
+
+def run_service_case(fn, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        try:
+            fn()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter_ns() - t0)
+    return summarize("service", latencies, time.perf_counter() - started, errors)
+
+async def run_http_case(client, fn, iterations: int, warmup: int, concurrency: int) -> dict:
+    for _ in range(warmup):
+        await fn(client)
+    latencies, errors = [], 0
+    remaining = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            t0 = time.perf_counter_ns()
+            response = await fn(client)
+            latencies.append(time.perf_counter_ns() - t0)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize("http", latencies, time.perf_counter() - started, errors)
+
+async def run_http(cases, iterations: int, warmup: int, concurrency: int) -> dict:
+    # Imported here so the service-only run does not start the app's background tasks
+    import main
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, fn, _, cap in cases:
+                n = min(iterations, cap) if cap else iterations
+                results[name] = await run_http_case(client, fn, n, min(warmup, n), concurrency)
+                print_row(name, results[name])
+    return results
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def cold_start(workers: int, timeout_s: float = 60.0) -> int:
+    """Nanoseconds from launching serve.py until GET /teams/ answers (migration check included)."""
+    port = _free_port()
+    started = time.perf_counter_ns()
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/teams/", timeout=1).read()
+                return time.perf_counter_ns() - started
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"no response within {timeout_s:.0f}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def coldstart_cases():
+    # More workers than cores would only measure the workers queueing for CPU while they import
+    return [
+        (f"cold start ({workers} worker{'s' if workers > 1 else ''})", lambda workers=workers: cold_start(workers), False, 20)
+        for workers in sorted({1, min(4, os.cpu_count() or 1)})
+    ]
+
+def run_cold_start_case(fn, runs: int) -> dict:
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        try:
+            latencies.append(fn())
+        except TimeoutError:
+            errors += 1
+    return summarize("coldstart", latencies, time.perf_counter() - started, errors)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_row(name: str, r: dict):
+    print(f"{name:<42} p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  p99 {r['p99_ms']:>9.2f}ms  "
+          f"{r['throughput_rps']:>9.1f}/s  rss {r['peak_rss_mb']}MB" + (f"  errors {r['errors']}" if r["errors"] else ""))
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before['meta'].get('commit')} -> {after['meta'].get('commit')}")
+    for name, new in after["cases"].items():
+        old = before["cases"].get(name)
+        if old is None:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            deltas.append(f"{key[:-3] if key.endswith('_ms') else 'rps'} {change:+6.1f}%")
+        print(f"{name:<42} " + "  ".join(deltas))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent in-flight HTTP requests")
+    parser.add_argument("--only", help="regex; run only the matching cases")
+    parser.add_argument("--suite", choices=["all", "service", "serialization", "http", "coldstart"], default="all")
+    parser.add_argument("--read-only", action="store_true", help="skip cases that write")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sample = Sample(args.seed)
+
+    def selected(cases):
+        return [
+            case for case in cases
+            if not (args.read_only and case[2]) and (not args.only or re.search(args.only, case[0]))
+        ]
+
+    results = {}
+    if args.suite in ("all", "service"):
+        for name, fn, _, cap in selected(service_cases(sample)):
+            n = min(args.iterations, cap) if cap else args.iterations
+            results[name] = run_service_case(fn, n, min(args.warmup, n))
+            print_row(name, results[name])
+    if args.suite in ("all", "serialization"):
+        for name, fn, _, cap in selected(serialization_cases(sample)):
+            n = min(args.iterations, cap) if cap else args.iterations
+            results[name] = run_service_case(fn, n, min(args.warmup, n))
+            print_row(name, results[name])
+    if args.suite in ("all", "http"):
+        results.update(asyncio.run(run_http(selected(http_cases(sample)), args.iterations, args.warmup, args.concurrency)))
+    if args.suite == "coldstart":
+        for name, fn, _, cap in selected(coldstart_cases()):
+            results[name] = run_cold_start_case(fn, min(args.iterations, cap))
+            print_row(name, results[name])
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.url.render_as_string(hide_password=True),
+            "rows": sample.counts,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+        },
+        "cases": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Reference data (teams, equipment) changes rarely; entries also expire so other workers' writes show up
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+
+# Cache keys
+TEAMS = "teams"
+EQUIPMENT = "equipment"
+
+def equipment_key(equipment_id: int) -> str:
+    return f"equipment:{equipment_id}"
+
+class CachedBody:
+    """A serialized JSON response body and its strong ETag (a content hash unless one is given)."""
+
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, ttl: float, etag: Optional[str] = None):
+        self.body = body
+        self.etag = etag or '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.expires_at = time.monotonic() + ttl
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses with a per-entry TTL.
+
+    Every key has a generation that invalidate() bumps. A reader takes generation(key) before it
+    loads and hands it to set(), which then stores nothing if the key was invalidated meanwhile:
+    the body was read before that write committed and may predate it.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def generation(self, key: str) -> tuple:
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, body: bytes, etag: Optional[str] = None,
+            generation: Optional[tuple] = None) -> CachedBody:
+        """Cache `body` under `key` unless `generation` (from generation()) is out of date; returns the entry either way."""
+        entry = CachedBody(body, self.ttl, etag)
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(key, 0)):
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+reference_cache = ResponseCache()
+
+# --- Invalidation on commit ---
+# Service marks keys on the session; they are dropped once the write is committed (also under group
+# commit). A reader that loaded before then cannot put its pre-write body back: the invalidate
+# bumped the key's generation, so its set() is refused. Other workers' caches only expire by TTL.
+
+_PENDING = "cache_invalidate"
+
+def invalidate_on_commit(db: Session, *keys: str):
+    db.info.setdefault(_PENDING, set()).update(keys)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    keys = session.info.pop(_PENDING, None)
+    if keys:
+        reference_cache.invalidate(*keys)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+def matches_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
@@ -0,0 +1,284 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import func, insert, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import (
+    Equipment, MaintenanceRequest, StatCounter, EquipmentRequestCount, RequestDailyRollup,
+    RequestStage, EquipmentStatus,
+)
+import archive
+import overdue
+
+# Counter dimensions stored in stat_counters
+REQUEST_STAGE = "request_stage"
+REQUEST_PRIORITY = "request_priority"
+EQUIPMENT_STATUS = "equipment_status"
+EQUIPMENT_CATEGORY = "equipment_category"
+
+UNCATEGORIZED = "Uncategorized"
+# What a NULL column counts as when rebuilding (mirrors the defaults used by the hooks)
+NULL_KEYS = {EQUIPMENT_CATEGORY: UNCATEGORIZED, EQUIPMENT_STATUS: EquipmentStatus.active}
+OPEN_STAGES = (RequestStage.new, RequestStage.in_progress)
+
+# All helpers below run Core statements on the caller's session, so they join the
+# caller's transaction and become visible only when the Service method commits.
+
+def _key(value) -> str:
+    return value.value if hasattr(value, "value") else str(value)
+
+def _as_date(value) -> date:
+    # func.date() returns a string on SQLite and a date on Postgres
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def add_to_row(db: Session, table, keys: list, rows):
+    """Add each row's non-key values onto the row with the same keys, creating it when missing.
+
+    One INSERT ... ON CONFLICT DO UPDATE (executemany when `rows` is a list), so two transactions
+    creating the same key both land instead of one failing on the primary key. Key columns must
+    not be NULL: NULLs never conflict, so such rows take the update-then-insert path.
+    """
+    table = getattr(table, "__table__", table)
+    rows = [rows] if isinstance(rows, dict) else rows
+    if not rows:
+        return
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None or any(row[name] is None for row in rows for name in keys):
+        for row in rows:
+            _update_then_insert(db, table, keys, row)
+        return
+    stmt = dialect_insert(table)
+    values = [name for name in rows[0] if name not in keys]
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys],
+            set_={name: table.c[name] + stmt.excluded[name] for name in values},
+        ),
+        rows,
+    )
+
+def _update_then_insert(db: Session, table, keys: list, row: dict):
+    result = db.execute(
+        update(table)
+        .where(*[table.c[name].is_(None) if row[name] is None else table.c[name] == row[name] for name in keys])
+        .values({name: table.c[name] + value for name, value in row.items() if name not in keys})
+    )
+    if result.rowcount == 0:
+        db.execute(insert(table).values(row))
+
+def bump(db: Session, dimension: str, key, delta: int = 1):
+    add_to_row(db, StatCounter, ["dimension", "key"], {"dimension": dimension, "key": _key(key), "count": delta})
+
+def bump_equipment_requests(db: Session, equipment_id: int, delta: int = 1):
+    bump_equipment_requests_many(db, {equipment_id: delta})
+
+def bump_equipment_requests_many(db: Session, counts: dict):
+    """bump_equipment_requests for many equipment at once: one executemany upsert."""
+    add_to_row(
+        db, EquipmentRequestCount, ["equipment_id"],
+        [{"equipment_id": eq_id, "request_count": count} for eq_id, count in counts.items()],
+    )
+
+def bump_daily(db: Session, team_id: Optional[int], stage: RequestStage, day: Optional[date] = None, delta: int = 1):
+    day = day or datetime.utcnow().date()
+    add_to_row(db, RequestDailyRollup, ["day", "team_id", "stage"], {"day": day, "team_id": team_id, "stage": stage, "count": delta})
+
+# --- Hooks called by Service ---
+
+def on_equipment_created(db: Session, equipment: Equipment):
+    bump(db, EQUIPMENT_STATUS, equipment.status or EquipmentStatus.active)
+    bump(db, EQUIPMENT_CATEGORY, equipment.category or UNCATEGORIZED)
+
+def on_equipment_status_changed(db: Session, old_status: EquipmentStatus, new_status: EquipmentStatus):
+    if old_status == new_status:
+        return
+    bump(db, EQUIPMENT_STATUS, old_status or EquipmentStatus.active, -1)
+    bump(db, EQUIPMENT_STATUS, new_status)
+
+def on_equipment_category_changed(db: Session, old_category: Optional[str], new_category: Optional[str]):
+    old_category, new_category = old_category or UNCATEGORIZED, new_category or UNCATEGORIZED
+    if old_category == new_category:
+        return
+    bump(db, EQUIPMENT_CATEGORY, old_category, -1)
+    bump(db, EQUIPMENT_CATEGORY, new_category)
+
+def on_request_created(db: Session, req: MaintenanceRequest):
+    bump(db, REQUEST_STAGE, req.stage)
+    bump(db, REQUEST_PRIORITY, req.priority)
+    bump_equipment_requests(db, req.equipment_id)
+    bump_daily(db, req.team_id, req.stage)
+
+def on_request_stage_changed(db: Session, req: MaintenanceRequest, old_stage: RequestStage, new_stage: RequestStage):
+    if old_stage == new_stage:
+        return
+    bump(db, REQUEST_STAGE, old_stage, -1)
+    bump(db, REQUEST_STAGE, new_stage)
+    bump_daily(db, req.team_id, new_stage)
+
+# --- Batch hooks (bulk ingestion): one statement per affected group, not per row ---
+
+def on_equipment_imported(db: Session, rows: list):
+    for status, count in Counter(row["status"] or EquipmentStatus.active for row in rows).items():
+        bump(db, EQUIPMENT_STATUS, status, count)
+    for category, count in Counter(row["category"] or UNCATEGORIZED for row in rows).items():
+        bump(db, EQUIPMENT_CATEGORY, category, count)
+
+def on_requests_stage_changed(db: Session, changes: list):
+    """`changes` holds (team_id, old_stage, new_stage) for each request that moved."""
+    for stage, count in Counter(old for _, old, new in changes if old != new).items():
+        bump(db, REQUEST_STAGE, stage, -count)
+    for stage, count in Counter(new for _, old, new in changes if old != new).items():
+        bump(db, REQUEST_STAGE, stage, count)
+    for (team_id, stage), count in Counter((team_id, new) for team_id, old, new in changes if old != new).items():
+        bump_daily(db, team_id, stage, delta=count)
+
+def on_equipment_scrapped(db: Session, old_statuses: list):
+    for status, count in Counter(status or EquipmentStatus.active for status in old_statuses).items():
+        if status != EquipmentStatus.scrapped:
+            bump(db, EQUIPMENT_STATUS, status, -count)
+            bump(db, EQUIPMENT_STATUS, EquipmentStatus.scrapped, count)
+
+def on_requests_imported(db: Session, rows: list):
+    for stage, count in Counter(_key(row["stage"]) for row in rows).items():
+        bump(db, REQUEST_STAGE, stage, count)
+    for priority, count in Counter(_key(row["priority"]) for row in rows).items():
+        bump(db, REQUEST_PRIORITY, priority, count)
+    bump_equipment_requests_many(db, Counter(row["equipment_id"] for row in rows))
+
+    daily_counts = Counter()
+    for row in rows:
+        daily_counts[(row["created_at"].date(), row["team_id"], RequestStage.new)] += 1
+        if row.get("close_date") and RequestStage(row["stage"]) in (RequestStage.repaired, RequestStage.scrap):
+            daily_counts[(row["close_date"].date(), row["team_id"], RequestStage(row["stage"]))] += 1
+    for (day, team_id, stage), count in daily_counts.items():
+        bump_daily(db, team_id, stage, day, count)
+
+# --- Rebuild (initial backfill or repair) ---
+
+def rebuild(db: Session):
+    """Recompute every counter from the raw tables with GROUP BY queries.
+
+    Archived requests still count, so the request side reads hot and archived rows together.
+    """
+    db.execute(delete(StatCounter))
+    db.execute(delete(EquipmentRequestCount))
+    db.execute(delete(RequestDailyRollup))
+
+    requests = archive.history("stage", "priority", "equipment_id", "team_id", "created_at", "close_date").c
+    groups = [
+        (REQUEST_STAGE, requests.stage),
+        (REQUEST_PRIORITY, requests.priority),
+        (EQUIPMENT_STATUS, Equipment.status),
+        (EQUIPMENT_CATEGORY, Equipment.category),
+    ]
+    for dimension, column in groups:
+        for key, count in db.query(column, func.count()).group_by(column).all():
+            if key is None:
+                key = NULL_KEYS.get(dimension)
+                if key is None:
+                    continue
+            bump(db, dimension, key, count)
+
+    per_equipment = (
+        db.query(requests.equipment_id, func.count())
+        .filter(requests.equipment_id.isnot(None))
+        .group_by(requests.equipment_id)
+        .all()
+    )
+    if per_equipment:
+        db.execute(
+            insert(EquipmentRequestCount),
+            [{"equipment_id": eq_id, "request_count": count} for eq_id, count in per_equipment],
+        )
+
+    # History only records creation and closing, so the daily backfill replays those two events.
+    # The table was just emptied, so the groups go in with one executemany instead of upserts.
+    daily_counts = Counter()
+    created_day = func.date(requests.created_at)
+    for day, team_id, count in (
+        db.query(created_day, requests.team_id, func.count())
+        .group_by(created_day, requests.team_id)
+        .all()
+    ):
+        if day:
+            daily_counts[(_as_date(day), team_id, RequestStage.new)] += count
+
+    closed_day = func.date(requests.close_date)
+    for day, team_id, stage, count in (
+        db.query(closed_day, requests.team_id, requests.stage, func.count())
+        .filter(
+            requests.close_date.isnot(None),
+            requests.stage.in_([RequestStage.repaired, RequestStage.scrap]),
+        )
+        .group_by(closed_day, requests.team_id, requests.stage)
+        .all()
+    ):
+        daily_counts[(_as_date(day), team_id, stage)] += count
+
+    if daily_counts:
+        db.execute(insert(RequestDailyRollup), [
+            {"day": day, "team_id": team_id, "stage": stage, "count": count}
+            for (day, team_id, stage), count in daily_counts.items()
+        ])
+
+    db.commit()
+
+def ensure_built(db: Session):
+    """Backfill the counters once for databases created before they existed."""
+    if db.query(StatCounter).first() is None and (
+        db.query(Equipment.id).first() is not None or db.query(MaintenanceRequest.id).first() is not None
+    ):
+        rebuild(db)
+
+# --- Reads ---
+
+def summary(db: Session, top_n: int = 5) -> dict:
+    counts = {}
+    for dimension, key, count in db.query(StatCounter.dimension, StatCounter.key, StatCounter.count).all():
+        if count:
+            counts.setdefault(dimension, {})[key] = count
+
+    by_stage = counts.get(REQUEST_STAGE, {})
+    by_status = counts.get(EQUIPMENT_STATUS, {})
+
+    top_equipment = (
+        db.query(Equipment.id, Equipment.name, EquipmentRequestCount.request_count)
+        .join(EquipmentRequestCount, EquipmentRequestCount.equipment_id == Equipment.id)
+        .filter(EquipmentRequestCount.request_count > 0)
+        .order_by(EquipmentRequestCount.request_count.desc())
+        .limit(top_n)
+        .all()
+    )
+
+    # Overdue depends on the clock, so it is counted live through ix_requests_open_stage_scheduled_date
+    overdue_count = (
+        db.query(func.count(MaintenanceRequest.id))
+        .filter(overdue.is_open(), MaintenanceRequest.scheduled_date < datetime.now())
+        .scalar()
+    )
+
+    return {
+        "total_equipment": sum(by_status.values()),
+        "active_equipment": by_status.get(EquipmentStatus.active.value, 0),
+        "total_requests": sum(by_stage.values()),
+        "open_requests": sum(by_stage.get(s.value, 0) for s in OPEN_STAGES),
+        "completed_requests": by_stage.get(RequestStage.repaired.value, 0),
+        "overdue_requests": overdue_count or 0,
+        "by_stage": by_stage,
+        "by_priority": counts.get(REQUEST_PRIORITY, {}),
+        "by_category": counts.get(EQUIPMENT_CATEGORY, {}),
+        "by_equipment_status": by_status,
+        "top_equipment": [
+            {"equipment_id": eq_id, "name": name, "request_count": count}
+            for eq_id, name, count in top_equipment
+        ],
+    }
+
+def daily(db: Session, start: date, end: date, team_id: Optional[int] = None):
+    query = db.query(RequestDailyRollup).filter(RequestDailyRollup.day >= start, RequestDailyRollup.day <= end)
+    if team_id is not None:
+        query = query.filter(RequestDailyRollup.team_id == team_id)
+    return query.order_by(RequestDailyRollup.day).all()
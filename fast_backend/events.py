@@ -0,0 +1,116 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Events buffered per client before the oldest are dropped (the client is then told to resync)
+SUBSCRIBER_BUFFER = int(os.getenv("EVENTS_BUFFER_SIZE", "256"))
+HEARTBEAT_SECONDS = 15
+
+class Subscriber:
+    """One connected board: a bounded queue owned by the event loop serving it."""
+
+    def __init__(self, loop, team_id: Optional[int] = None, technician_id: Optional[int] = None,
+                 maxsize: int = SUBSCRIBER_BUFFER):
+        self.loop = loop
+        self.team_id = team_id
+        self.technician_id = technician_id
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def matches(self, evt: dict) -> bool:
+        if self.team_id is not None and evt.get("team_id") not in (None, self.team_id):
+            return False
+        if self.technician_id is not None and evt.get("technician_id") not in (None, self.technician_id):
+            return False
+        return True
+
+    def offer(self, evt: dict):
+        # Runs on the subscriber's loop; a slow client loses its oldest events, never blocks publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(evt)
+
+    async def next_event(self, timeout: float) -> Optional[dict]:
+        """The next event, a resync marker after an overflow, or None on timeout."""
+        try:
+            evt = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if self.overflowed:
+            self.overflowed = False
+            return {"type": "resync"}
+        return evt
+
+class EventBroker:
+    """In-process fan-out. publish() is thread-safe; subscribe() must run on an event loop."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def subscribe(self, team_id: Optional[int] = None, technician_id: Optional[int] = None) -> Subscriber:
+        sub = Subscriber(asyncio.get_running_loop(), team_id, technician_id)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, evt: dict):
+        evt = {"seq": next(self._sequence), **evt}
+        with self._lock:
+            targets = [sub for sub in self._subscribers if sub.matches(evt)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, evt)
+            except RuntimeError:
+                # Loop already closed; the subscriber is going away
+                self.unsubscribe(sub)
+
+broker = EventBroker()
+
+# --- Publishing from Service ---
+# Events are queued on the session and only published once the write commits.
+
+_PENDING = "events_pending"
+
+def publish_on_commit(db: Session, evt: dict):
+    db.info.setdefault(_PENDING, []).append(evt)
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    for evt in session.info.pop(_PENDING, ()):
+        broker.publish(evt)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+def _value(v):
+    return v.value if hasattr(v, "value") else v
+
+def request_event(kind: str, req, **extra) -> dict:
+    return {
+        "type": kind,
+        "id": req.id,
+        "stage": _value(req.stage),
+        "priority": _value(req.priority),
+        "team_id": req.team_id,
+        "technician_id": req.technician_id,
+        "equipment_id": req.equipment_id,
+        "version": req.version,
+        **{key: _value(value) for key, value in extra.items()},
+    }
+
+def sse_format(evt: dict) -> str:
+    return f"id: {evt.get('seq', '')}\nevent: {evt['type']}\ndata: {json.dumps(evt, default=str)}\n\n"
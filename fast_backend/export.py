@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterator, Optional
+from sqlalchemy import select
+from database import ReadSessionLocal
+from models import ArchivedRequest, Equipment, MaintenanceRequest, RequestStage, EquipmentStatus
+
+# Rows fetched per round-trip; memory stays bounded by one batch regardless of table size
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+REQUEST_FIELDS = (
+    "id", "subject", "req_type", "stage", "priority", "equipment_id", "team_id", "technician_id",
+    "created_by_id", "scheduled_date", "close_date", "duration_hours", "created_at",
+)
+
+EQUIPMENT_COLUMNS = [
+    Equipment.id,
+    Equipment.name,
+    Equipment.serial_number,
+    Equipment.category,
+    Equipment.location,
+    Equipment.status,
+    Equipment.assigned_team_id,
+    Equipment.assigned_technician_id,
+    Equipment.purchase_date,
+    Equipment.warranty_end,
+    Equipment.created_at,
+]
+
+def _encode(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _stream(statements: list, fmt: str) -> Iterator[str]:
+    # The generator owns its session: it outlives the request handler that created the response.
+    # Statements run one after the other and must select the same columns.
+    db = ReadSessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for index, statement in enumerate(statements):
+            result = db.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+            names = list(result.keys())
+            if fmt == "csv" and index == 0:
+                writer.writerow(names)
+                yield buffer.getvalue()
+
+            for batch in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                for row in batch:
+                    values = [_encode(v) for v in row]
+                    if fmt == "csv":
+                        writer.writerow(values)
+                    else:
+                        buffer.write(json.dumps(dict(zip(names, values))))
+                        buffer.write("\n")
+                yield buffer.getvalue()
+    finally:
+        db.close()
+
+def iter_requests(
+    fmt: str = "ndjson",
+    stage: Optional[RequestStage] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Iterator[str]:
+    # Like /requests/, archived rows are only exported for a created_at range, after the hot ones
+    models = [MaintenanceRequest]
+    if created_from or created_to:
+        models.append(ArchivedRequest)
+    statements = []
+    for model in models:
+        statement = select(*(getattr(model, name) for name in REQUEST_FIELDS)).order_by(model.id)
+        if stage:
+            statement = statement.where(model.stage == stage)
+        if created_from:
+            statement = statement.where(model.created_at >= created_from)
+        if created_to:
+            statement = statement.where(model.created_at < created_to)
+        statements.append(statement)
+    return _stream(statements, fmt)
+
+def iter_equipment(
+    fmt: str = "ndjson",
+    status: Optional[EquipmentStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Iterator[str]:
+    statement = select(*EQUIPMENT_COLUMNS).order_by(Equipment.id)
+    if status:
+        statement = statement.where(Equipment.status == status)
+    if created_from:
+        statement = statement.where(Equipment.created_at >= created_from)
+    if created_to:
+        statement = statement.where(Equipment.created_at < created_to)
+    return _stream([statement], fmt)
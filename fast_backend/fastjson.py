@@ -0,0 +1,34 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib fallback writes the same document, only slower
+    orjson = None
+
+def _default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        # Pydantic writes UTC as "Z"; keep the fast path byte-compatible with response_model output
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    """Encode plain dicts/lists (enums, dates and datetimes included) to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """JSON response for pre-shaped rows: no response_model validation, encoded by orjson when installed."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,44 @@
+"""Periodic background jobs that must run in one process at a time.
+
+Every worker runs the same loop, but a pass only happens in the worker whose UPDATE moves the
+job's next_run_at forward: on Postgres the row lock makes concurrent claims wait and then find
+the job no longer due, and SQLite serializes writers anyway. The first pass comes one interval
+after the job's row is created, and restarts keep the schedule, so booting N workers (or
+restarting one) does not set off a run.
+"""
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import JobSchedule
+
+logger = logging.getLogger(__name__)
+
+# Seconds between a worker's checks for due jobs (each job's own interval sets how often it runs)
+POLL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL", "30"))
+WORKER = f"{socket.gethostname()}:{os.getpid()}"
+
+def claim(session_factory, name: str, interval_seconds: float) -> bool:
+    """True when this worker should run `name` now; its next run is then booked an interval ahead."""
+    now = datetime.utcnow()
+    next_run_at = now + timedelta(seconds=interval_seconds)
+    db = session_factory()
+    try:
+        if db.get(JobSchedule, name) is None:
+            db.add(JobSchedule(name=name, next_run_at=next_run_at))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # another worker created it first
+            return False
+        result = db.execute(
+            update(JobSchedule)
+            .where(JobSchedule.name == name, JobSchedule.next_run_at <= now)
+            .values(next_run_at=next_run_at, claimed_by=WORKER, claimed_at=now)
+        )
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close()
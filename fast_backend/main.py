@@ -1,15 +1,32 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+import asyncio
+import functools
+import logging
+import sys
+from pydantic import TypeAdapter, create_model
 
-import models
 import schemas
-from database import engine, get_db
-from services import Service
+import counters
+import cache
+import events
+import scheduler
+import workload
+import metrics
+import fastjson
+import jobs
+import reliability
+import migrations
+import archive
+import overdue
+from database import engine, SessionLocal, ReadSessionLocal, SessionRunner, get_read_runner, get_write_runner, write_queue
+from services import Service, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, REQUEST_EXPANSIONS, EQUIPMENT_EXPANSIONS, SEARCH_MAX_LIMIT, SEARCH_MAX_OFFSET, parse_expand
 
-# Create Tables
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="GearGuard Backend", version="1.0")
 
@@ -19,49 +36,506 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.on_event("startup")
+def check_schema():
+    # One version lookup when serve.py (or another worker) already migrated; applies pending steps otherwise
+    migrations.upgrade(engine)
+
+@app.on_event("startup")
+def backfill_counters():
+    db = SessionLocal()
+    try:
+        counters.ensure_built(db)
+        reliability.ensure_built(db)
+    finally:
+        db.close()
+
+def _rebuild_workload():
+    db = SessionLocal()
+    try:
+        workload.index.rebuild(db)
+    finally:
+        db.close()
+
+async def _workload_loop():
+    # Resync with the database so writes from other workers and membership edits show up
+    while True:
+        await asyncio.sleep(workload.REFRESH_SECONDS)
+        try:
+            await run_in_threadpool(_rebuild_workload)
+        except Exception:
+            logger.exception("Workload index refresh failed")
+
+@app.on_event("startup")
+async def build_workload_index():
+    await run_in_threadpool(_rebuild_workload)
+    app.state.workload_task = None
+    if workload.REFRESH_SECONDS > 0:
+        app.state.workload_task = asyncio.create_task(_workload_loop())
+
+async def _periodic(name: str, interval_seconds: float, run):
+    # Every worker polls; jobs.claim lets one of them run each pass, an interval after the last
+    while True:
+        await asyncio.sleep(min(jobs.POLL_SECONDS, interval_seconds))
+        try:
+            if await run_in_threadpool(jobs.claim, SessionLocal, name, interval_seconds):
+                await run_in_threadpool(run, SessionLocal)
+        except Exception:
+            logger.exception("Background job %s failed", name)
+
+@app.on_event("startup")
+async def start_preventive_scheduler():
+    app.state.preventive_task = None
+    if scheduler.RUN_INTERVAL_SECONDS > 0:
+        app.state.preventive_task = asyncio.create_task(
+            _periodic("preventive_scheduler", scheduler.RUN_INTERVAL_SECONDS, scheduler.run_once)
+        )
+
+@app.on_event("startup")
+async def start_archiver():
+    app.state.archive_task = None
+    if archive.RUN_INTERVAL_SECONDS > 0:
+        app.state.archive_task = asyncio.create_task(_periodic("archive", archive.RUN_INTERVAL_SECONDS, archive.run_once))
+
+async def _overdue_loop():
+    # Each sweep covers the scheduled dates passed since the previous one; what was already
+    # overdue at startup is served by /requests/overdue, not re-announced
+    since = datetime.now()
+    while True:
+        await asyncio.sleep(overdue.SWEEP_INTERVAL_SECONDS)
+        now = datetime.now()
+        try:
+            await run_in_threadpool(overdue.run_once, ReadSessionLocal, since, now)
+            since = now
+        except Exception:
+            logger.exception("Overdue sweep failed")
+
+@app.on_event("startup")
+async def start_overdue_sweeper():
+    app.state.overdue_task = None
+    if overdue.SWEEP_INTERVAL_SECONDS > 0:
+        app.state.overdue_task = asyncio.create_task(_overdue_loop())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    if app.state.preventive_task is not None:
+        app.state.preventive_task.cancel()
+    if app.state.archive_task is not None:
+        app.state.archive_task.cancel()
+    if app.state.overdue_task is not None:
+        app.state.overdue_task.cancel()
+    if app.state.workload_task is not None:
+        app.state.workload_task.cancel()
+
+@app.on_event("shutdown")
+def flush_stage_log():
+    # Before the write queue stops: on the production profile the log is written through it.
+    # Only loaded once a stage changed, so there is nothing to flush otherwise.
+    stage_log = sys.modules.get("stage_log")
+    if stage_log is not None:
+        stage_log.writer.stop()
+
+@app.on_event("shutdown")
+def drain_write_queue():
+    if write_queue is not None:
+        write_queue.stop()
+
+# --- Optimistic concurrency (If-Match) ---
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+def if_match_version(if_match: Optional[str]) -> Optional[int]:
+    """The version an If-Match header pins the write to; None when absent or "*"."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail='If-Match must be the version from the ETag, e.g. "3"')
+
+# --- Cached reference data (ETag / If-None-Match) ---
+EQUIPMENT_ITEM = TypeAdapter(schemas.Equipment)
+
+def _versioned(adapter: TypeAdapter, fn):
+    # Serialize inside the session call so the cache stores the final JSON bytes. The version is
+    # the ETag, so the tag a client revalidates with is also its If-Match value for writes.
+    def call(db, *args):
+        item = adapter.validate_python(fn(db, *args), from_attributes=True)
+        return adapter.dump_json(item), version_etag(item.version)
+    return call
+
+def _plain_json(fn):
+    # List paths: column tuples -> dicts -> JSON bytes, skipping ORM objects and model validation
+    def call(db, *args):
+        return fastjson.dumps(fn(db, *args, plain=True))
+    return call
+
+# --- Expanded lists (?expand=) ---
+EXPAND_DESCRIPTION = "Comma-separated relations to nest as summaries: "
+
+@functools.lru_cache(maxsize=None)
+def _expanded_list(model, names: tuple) -> TypeAdapter:
+    # The expanded schema's base plus only the requested relation fields: unrequested relations are
+    # raiseload-ed, so validation must never read them
+    fields = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in names}
+    return TypeAdapter(List[create_model(model.__name__, __base__=model.__base__, **fields)])
+
+def _expanded_json(model, rows, expand: frozenset, allowed: dict) -> Response:
+    adapter = _expanded_list(model, tuple(name for name in allowed if name in expand))
+    items = adapter.validate_python(rows, from_attributes=True)
+    return Response(adapter.dump_json(items), media_type="application/json")
+
+async def _cached_json(key: str, if_none_match: Optional[str], load):
+    entry = cache.reference_cache.get(key)
+    if entry is None:
+        # Taken before the load: a write committed while loading makes set() skip the stale body
+        generation = cache.reference_cache.generation(key)
+        loaded = await load()
+        body, etag = loaded if isinstance(loaded, tuple) else (loaded, None)
+        entry = cache.reference_cache.set(key, body, etag, generation=generation)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if cache.matches_etag(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
 
 # --- TEAMS ---
 @app.post("/teams/", response_model=schemas.MaintenanceTeam)
-def create_team(team: schemas.MaintenanceTeamCreate, db: Session = Depends(get_db)):
-    return Service.create_team(db, team)
+async def create_team(team: schemas.MaintenanceTeamCreate, db: SessionRunner = Depends(get_write_runner)):
+    return await db.run(Service.create_team, team)
 
 @app.get("/teams/", response_model=List[schemas.MaintenanceTeam])
-def read_teams(db: Session = Depends(get_db)):
-    return Service.get_teams(db)
+async def read_teams(
+    if_none_match: Optional[str] = Header(None),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    return await _cached_json(cache.TEAMS, if_none_match, lambda: db.run(_plain_json(Service.get_teams)))
 
 # --- EQUIPMENT ---
 @app.post("/equipment/", response_model=schemas.Equipment)
-def create_equipment(eq: schemas.EquipmentCreate, db: Session = Depends(get_db)):
-    return Service.create_equipment(db, eq)
+async def create_equipment(eq: schemas.EquipmentCreate, db: SessionRunner = Depends(get_write_runner)):
+    return await db.run(Service.create_equipment, eq)
+
+@app.post("/equipment/bulk", response_model=schemas.BulkResult)
+async def bulk_create_equipment(items: List[schemas.EquipmentCreate], db: SessionRunner = Depends(get_write_runner)):
+    return await db.run(Service.bulk_create_equipment, items)
 
 @app.get("/equipment/", response_model=List[schemas.Equipment])
-def read_equipment(db: Session = Depends(get_db)):
-    return Service.get_equipment(db)
+async def read_equipment(
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION + ", ".join(EQUIPMENT_EXPANSIONS)),
+    if_none_match: Optional[str] = Header(None),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    expand = parse_expand(expand, EQUIPMENT_EXPANSIONS)
+    if expand:
+        # Not cached: the nested team/technician data has its own invalidation story
+        rows = await db.run(Service.get_equipment, expand)
+        return _expanded_json(schemas.EquipmentExpanded, rows, expand, EQUIPMENT_EXPANSIONS)
+    return await _cached_json(
+        cache.EQUIPMENT, if_none_match, lambda: db.run(_plain_json(Service.get_equipment))
+    )
+
+@app.get("/equipment/{equipment_id}", response_model=schemas.Equipment)
+async def read_equipment_item(
+    equipment_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    return await _cached_json(
+        cache.equipment_key(equipment_id),
+        if_none_match,
+        lambda: db.run(_versioned(EQUIPMENT_ITEM, Service.get_equipment_item), equipment_id),
+    )
+
+@app.patch("/equipment/{equipment_id}", response_model=schemas.Equipment)
+async def update_equipment(
+    equipment_id: int,
+    changes: schemas.EquipmentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: SessionRunner = Depends(get_write_runner),
+):
+    equipment = await db.run(Service.update_equipment, equipment_id, changes, if_match_version(if_match))
+    response.headers["ETag"] = version_etag(equipment.version)
+    return equipment
 
 # --- REQUESTS ---
 @app.post("/requests/", response_model=schemas.MaintenanceRequest)
-def create_request(req: schemas.MaintenanceRequestCreate, db: Session = Depends(get_db)):
-    return Service.create_request(db, req)
+async def create_request(req: schemas.MaintenanceRequestCreate, db: SessionRunner = Depends(get_write_runner)):
+    return await db.run(Service.create_request, req)
+
+@app.post("/requests/bulk", response_model=schemas.BulkResult)
+async def bulk_create_requests(items: List[schemas.MaintenanceRequestImport], db: SessionRunner = Depends(get_write_runner)):
+    return await db.run(Service.bulk_create_requests, items)
 
 @app.get("/requests/", response_model=List[schemas.MaintenanceRequest])
-def read_requests(db: Session = Depends(get_db)):
-    return Service.get_requests(db)
+async def read_requests(
+    stage: Optional[schemas.RequestStage] = None,
+    priority: Optional[schemas.RequestPriority] = None,
+    req_type: Optional[schemas.RequestType] = None,
+    team_id: Optional[int] = None,
+    technician_id: Optional[int] = None,
+    equipment_id: Optional[int] = None,
+    scheduled_from: Optional[datetime] = None,
+    scheduled_to: Optional[datetime] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[int] = Query(None, description="Last id of the previous page (from X-Next-Cursor)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION + ", ".join(REQUEST_EXPANSIONS)),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    expand = parse_expand(expand, REQUEST_EXPANSIONS)
+    rows, next_cursor = await db.run(
+        Service.get_requests,
+        stage=stage,
+        priority=priority,
+        req_type=req_type,
+        team_id=team_id,
+        technician_id=technician_id,
+        equipment_id=equipment_id,
+        scheduled_from=scheduled_from,
+        scheduled_to=scheduled_to,
+        created_from=created_from,
+        created_to=created_to,
+        cursor=cursor,
+        limit=limit,
+        expand=expand,
+        plain=not expand,
+    )
+    # response_model stays for the OpenAPI schema; the rows already have its shape, so skip re-validating them
+    if expand:
+        response = _expanded_json(schemas.MaintenanceRequestExpanded, rows, expand, REQUEST_EXPANSIONS)
+    else:
+        response = fastjson.FastJSONResponse(rows)
+    # Body stays a plain list so existing clients keep working; the next page is signalled by header
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return response
+
+@app.get("/requests/calendar", response_model=schemas.Calendar)
+async def read_request_calendar(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    team_id: Optional[int] = None,
+    db: SessionRunner = Depends(get_read_runner),
+):
+    # Defaults to the 42-day grid of a month view starting today
+    start = start or date.today()
+    end = end or start + timedelta(days=41)
+    return await db.run(Service.get_calendar, start, end, team_id)
+
+async def _due_requests(method, db: SessionRunner, limit: int, **filters):
+    rows, total = await db.run(method, limit=limit, **filters)
+    response = fastjson.FastJSONResponse(rows)
+    response.headers["X-Total-Count"] = str(total)
+    return response
+
+@app.get("/requests/overdue", response_model=List[schemas.MaintenanceRequest])
+async def read_overdue_requests(
+    team_id: Optional[int] = None,
+    technician_id: Optional[int] = None,
+    req_type: Optional[schemas.RequestType] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    # Open requests scheduled before now, most overdue first; X-Total-Count has the full count
+    return await _due_requests(Service.get_overdue, db, limit, team_id=team_id, technician_id=technician_id, req_type=req_type)
+
+@app.get("/requests/due-today", response_model=List[schemas.MaintenanceRequest])
+async def read_requests_due_today(
+    team_id: Optional[int] = None,
+    technician_id: Optional[int] = None,
+    req_type: Optional[schemas.RequestType] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    # Open requests scheduled for today (server time), earliest first; X-Total-Count has the full count
+    return await _due_requests(Service.get_due_today, db, limit, team_id=team_id, technician_id=technician_id, req_type=req_type)
+
+@app.put("/requests/stage", response_model=schemas.BulkStageResult)
+async def bulk_update_request_stage(
+    items: List[schemas.StageChange],
+    actor_id: Optional[int] = Query(None, description="User making the changes, recorded in the stage history"),
+    db: SessionRunner = Depends(get_write_runner),
+):
+    return await db.run(Service.bulk_change_stage, items, actor_id)
+
+@app.get("/requests/{req_id}/history", response_model=List[schemas.StageEvent])
+async def read_request_history(req_id: int, db: SessionRunner = Depends(get_read_runner)):
+    # Log rows land up to STAGE_LOG_FLUSH_INTERVAL seconds after the change (unless STAGE_LOG_SYNC=1)
+    return await db.run(Service.get_stage_history, req_id)
 
 @app.put("/requests/{req_id}/stage", response_model=schemas.MaintenanceRequest)
-def update_request_stage(req_id: int, stage: schemas.RequestStage, db: Session = Depends(get_db)):
-    return Service.change_stage(db, req_id, stage)
+async def update_request_stage(
+    req_id: int,
+    stage: schemas.RequestStage,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    actor_id: Optional[int] = Query(None, description="User making the change, recorded in the stage history"),
+    db: SessionRunner = Depends(get_write_runner),
+):
+    req = await db.run(Service.change_stage, req_id, stage, if_match_version(if_match), actor_id)
+    response.headers["ETag"] = version_etag(req.version)
+    return req
+
+# --- PREVENTIVE PLANS ---
+@app.post("/preventive/plans", response_model=schemas.PreventivePlan)
+async def create_plan(plan: schemas.PreventivePlanCreate, db: SessionRunner = Depends(get_write_runner)):
+    return await db.run(Service.create_plan, plan)
+
+@app.get("/preventive/plans", response_model=List[schemas.PreventivePlan])
+async def read_plans(equipment_id: Optional[int] = None, db: SessionRunner = Depends(get_read_runner)):
+    return await db.run(Service.get_plans, equipment_id)
+
+@app.post("/preventive/run", response_model=Optional[schemas.SchedulerRun])
+async def run_preventive_scheduler(horizon_days: int = Query(scheduler.HORIZON_DAYS, ge=1, le=366)):
+    # Batches commit on their own, so this runs outside the per-request session
+    return await run_in_threadpool(scheduler.run_once, SessionLocal, horizon_days)
+
+@app.post("/archive/run", response_model=schemas.ArchiveRun)
+async def run_archiver(older_than_days: int = Query(archive.AFTER_DAYS, ge=0)):
+    # Batches commit on their own, so this runs outside the per-request session
+    return await run_in_threadpool(archive.run_once, SessionLocal, older_than_days)
+
+# --- SEARCH ---
+@app.get("/search", response_model=schemas.SearchResult)
+async def search_all(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to match; the last one is matched as a prefix"),
+    type: schemas.SearchKind = schemas.SearchKind.all,
+    sort: schemas.SearchSort = schemas.SearchSort.relevance,
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    return await db.run(Service.search, q, type, sort, limit, offset)
+
+# --- REPORTS ---
+@app.get("/reports/summary", response_model=schemas.ReportSummary)
+async def read_report_summary(
+    top: int = Query(5, ge=1, description="How many equipment rows top_equipment lists, most requests first"),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    return await db.run(Service.get_report_summary, top)
+
+@app.get("/analytics/reliability", response_model=List[schemas.ReliabilityStats])
+async def read_reliability(
+    scope: schemas.ReliabilityScope = schemas.ReliabilityScope.equipment,
+    key: Optional[str] = Query(None, description="Equipment id, category name or team id; omit for the top rows by failures"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: SessionRunner = Depends(get_read_runner),
+):
+    return await db.run(Service.get_reliability, scope, key, limit)
+
+@app.get("/analytics/cycle-time", response_model=List[schemas.CycleTimeStats])
+async def read_cycle_times(
+    group_by: Optional[schemas.CycleTimeGroup] = Query(None, description="Split each stage by team or technician"),
+    since: Optional[datetime] = Query(None, description="Only moves out of a stage at or after this time"),
+    until: Optional[datetime] = None,
+    team_id: Optional[int] = None,
+    technician_id: Optional[int] = None,
+    db: SessionRunner = Depends(get_read_runner),
+):
+    # Hours spent in each stage, from the stage history
+    return await db.run(Service.get_cycle_times, group_by, since, until, team_id, technician_id)
+
+@app.get("/reports/daily", response_model=List[schemas.DailyRollup])
+async def read_daily_rollups(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    team_id: Optional[int] = None,
+    db: SessionRunner = Depends(get_read_runner),
+):
+    # Defaults to the last 30 days
+    end = end or date.today()
+    start = start or end - timedelta(days=30)
+    return await db.run(Service.get_daily_rollups, start, end, team_id)
+
+# --- EXPORT ---
+# Streamed straight from a batched cursor so memory stays flat and the first byte is sent immediately.
+# The export module is imported on first use, keeping it off the worker's boot path.
+def _export_response(chunks, fmt: schemas.ExportFormat, name: str):
+    import export
+    return StreamingResponse(
+        chunks,
+        media_type=export.MEDIA_TYPES[fmt.value],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'},
+    )
+
+@app.get("/export/requests")
+def export_requests(
+    format: schemas.ExportFormat = schemas.ExportFormat.ndjson,
+    stage: Optional[schemas.RequestStage] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    import export
+    chunks = export.iter_requests(format.value, stage, created_from, created_to)
+    return _export_response(chunks, format, "requests")
+
+@app.get("/export/equipment")
+def export_equipment(
+    format: schemas.ExportFormat = schemas.ExportFormat.ndjson,
+    status: Optional[schemas.EquipmentStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    import export
+    chunks = export.iter_equipment(format.value, status, created_from, created_to)
+    return _export_response(chunks, format, "equipment")
+
+# --- LIVE EVENTS ---
+@app.get("/events")
+async def stream_events(request: Request, team_id: Optional[int] = None, technician_id: Optional[int] = None):
+    """Server-Sent Events: compact request deltas, optionally filtered by team or technician."""
+    sub = events.broker.subscribe(team_id, technician_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                evt = await sub.next_event(events.HEARTBEAT_SECONDS)
+                yield events.sse_format(evt) if evt else ": ping\n\n"
+        finally:
+            events.broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/events/ws")
+async def websocket_events(websocket: WebSocket, team_id: Optional[int] = None, technician_id: Optional[int] = None):
+    await websocket.accept()
+    sub = events.broker.subscribe(team_id, technician_id)
+    try:
+        while True:
+            evt = await sub.next_event(events.HEARTBEAT_SECONDS)
+            await websocket.send_json(evt or {"type": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        events.broker.unsubscribe(sub)
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    # Prometheus text exposition format
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/")
 def home():
     return {"message": "GearGuard Backend is Running (SQLite). usage: /docs for swagger"}
 
 if __name__ == "__main__":
-    import uvicorn
-    # Using 127.0.0.1 is safer for Windows local development
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    import serve
+    serve.main()
 
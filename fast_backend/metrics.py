@@ -0,0 +1,245 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with the shape (not the values) of their parameters
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values (Prometheus semantics)."""
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        # bisect_left: a value equal to a bound belongs in that bucket (le = less or equal)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total, n) for key, (counts, total, n) in self._series.items()]
+        for key, counts, total, n in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{float(bound)!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {n}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.label_names, key)} {value}" for key, value in snapshot)
+        return lines
+
+# --- Metrics ---
+
+http_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response body is sent",
+    ("method", "route", "status"),
+)
+http_sql_statements = Histogram(
+    "http_request_sql_statements", "SQL statements executed while serving one HTTP request",
+    ("method", "route"), COUNT_BUCKETS,
+)
+http_sql_seconds = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL while serving one HTTP request", ("method", "route"),
+)
+sql_duration = Histogram("sql_statement_duration_seconds", "Duration of each SQL statement", ("engine",))
+slow_queries = Counter("sql_slow_queries_total", f"Statements slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms)", ("engine",))
+pool_wait = Histogram("db_pool_checkout_wait_seconds", "Time to check out a connection, including opening a new one", ("engine",))
+pool_timeouts = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ("engine",))
+
+_engines = {}
+
+# --- Per-request SQL accounting ---
+# The middleware puts a RequestStats in a contextvar; the thread pool, run_sync and the write
+# queue all carry the context over, so statements run on behalf of a request are attributed to
+# it. Only the writer's shared group COMMIT shows up in the global sql_* metrics alone.
+
+class RequestStats:
+    __slots__ = ("statements", "sql_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+def _param_shape(params):
+    if isinstance(params, (list, tuple)) and params and isinstance(params[0], (dict, list, tuple)):
+        return f"{len(params)} x {_param_shape(params[0])}"
+    if isinstance(params, dict):
+        return {key: _value_shape(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_value_shape(value) for value in params]
+    return type(params).__name__
+
+def _value_shape(value):
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def instrument_engine(sync_engine, name: str):
+    """Time every statement on `sync_engine` and report its pool under `name`."""
+    _engines[name] = sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        sql_duration.observe(elapsed, name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.sql_seconds += elapsed
+        # executemany batches are judged per row, or every bulk import would be "slow"
+        rows = len(parameters) if executemany and parameters else 1
+        if elapsed * 1000 / rows >= SLOW_QUERY_MS:
+            slow_queries.inc(name)
+            logger.warning(
+                "Slow query on %s (%.1f ms): %s | params: %s",
+                name, elapsed * 1000, " ".join(statement.split())[:500], _param_shape(parameters),
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
+
+def timed_pool(pool_class, name: str):
+    """`pool_class` with checkout wait time recorded (SQLAlchemy has no before-checkout event)."""
+
+    class TimedPool(pool_class):
+        # A class attribute, so pools rebuilt by engine.dispose() keep reporting under the same name
+        metrics_name = name
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                pool_timeouts.inc(self.metrics_name)
+                raise
+            finally:
+                pool_wait.observe(time.perf_counter() - started, self.metrics_name)
+
+    TimedPool.__name__ = "Timed" + pool_class.__name__
+    return TimedPool
+
+# --- HTTP middleware ---
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware buffering) recording latency and SQL per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            # Route templates, not raw paths, keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            http_duration.observe(elapsed, method, route, str(status[0]))
+            http_sql_statements.observe(stats.statements, method, route)
+            http_sql_seconds.observe(stats.sql_seconds, method, route)
+
+# --- Exposition ---
+
+def _pool_lines() -> list:
+    lines = [
+        "# HELP db_pool_connections Connections per pool by state",
+        "# TYPE db_pool_connections gauge",
+    ]
+    saturation = [
+        "# HELP db_pool_saturation Checked-out connections over the pool's capacity (size + max overflow)",
+        "# TYPE db_pool_saturation gauge",
+    ]
+    for name, sync_engine in sorted(_engines.items()):
+        pool = sync_engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue  # Static/single-connection pools have no capacity to report
+        checked_out = pool.checkedout()
+        lines.append(f'db_pool_connections{{engine="{name}",state="checked_out"}} {checked_out}')
+        lines.append(f'db_pool_connections{{engine="{name}",state="idle"}} {pool.checkedin()}')
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        saturation.append(f'db_pool_saturation{{engine="{name}"}} {checked_out / capacity if capacity else 0.0}')
+    return lines + saturation
+
+def render() -> str:
+    lines = []
+    for metric in (http_duration, http_sql_statements, http_sql_seconds, sql_duration, slow_queries, pool_wait, pool_timeouts):
+        lines.extend(metric.render())
+    lines.extend(_pool_lines())
+    return "\n".join(lines) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,180 @@
+"""Versioned schema migrations.
+
+schema_migrations records every applied step, and its highest version is the schema's version.
+When that equals HEAD, startup does nothing else: one query instead of create_all reflecting
+every table in every worker. `python serve.py` applies pending steps once, before the workers
+start; a process that still finds the schema behind (e.g. plain `uvicorn main:app`) applies them
+itself, under a lock, so concurrent workers never run the same step twice.
+
+Steps must be idempotent. A database from before versioning starts at version 0 and replays every
+step against what it already has, and a fresh one gets its tables from step 1 in their current
+shape, so later steps find their work already done.
+"""
+import logging
+import re
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from models import ArchivedRequest, Base, Equipment, JobSchedule, MaintenanceRequest, RequestStageEvent, SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+# Any constant works, as long as every process migrating the database uses the same one
+POSTGRES_LOCK_KEY = 47112024
+
+Migration = namedtuple("Migration", "version name apply")
+
+# --- Building blocks for steps ---
+
+def add_columns(conn, columns: list):
+    """ALTER TABLE ADD COLUMN for the columns a table is missing (create_all never alters a table)."""
+    inspector = inspect(conn)
+    for column in columns:
+        if column.name in {c["name"] for c in inspector.get_columns(column.table.name)}:
+            continue
+        table = conn.dialect.identifier_preparer.format_table(column.table)
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {CreateColumn(column).compile(dialect=conn.dialect)}")
+
+def model_indexes(conn, tables: list) -> dict:
+    """{name: CREATE INDEX IF NOT EXISTS ...} for the indexes declared on `tables`."""
+    return {
+        index.name: str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+        for table in tables for index in table.indexes
+    }
+
+def create_indexes(conn, statements: dict):
+    """Build the missing indexes among `statements` ({name: CREATE INDEX IF NOT EXISTS ...}).
+
+    Postgres builds them online (CONCURRENTLY, so writes continue meanwhile), which cannot run
+    in a transaction: the step's transaction is committed first and each build runs in
+    autocommit. An index left INVALID by a build that died halfway is dropped and rebuilt.
+    SQLite has no online build; the indexes are built inside the step's write transaction,
+    which WAL readers do not wait for.
+    """
+    if conn.dialect.name != "postgresql":
+        for statement in statements.values():
+            conn.exec_driver_sql(statement)
+        return
+    conn.commit()
+    with conn.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as online:
+        for name, statement in statements.items():
+            invalid = online.execute(
+                text("SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name AND NOT i.indisvalid"),
+                {"name": name},
+            ).first()
+            if invalid:
+                online.exec_driver_sql(f'DROP INDEX CONCURRENTLY "{name}"')
+            online.exec_driver_sql(re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY ", statement))
+
+def drop_indexes(conn, names: list):
+    """Drop indexes a later step replaced; online on Postgres, like create_indexes."""
+    if conn.dialect.name != "postgresql":
+        for name in names:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+        return
+    conn.commit()
+    with conn.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as online:
+        for name in names:
+            online.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+# --- Steps (append only; never edit one that has shipped) ---
+
+def _initial_schema(conn):
+    Base.metadata.create_all(conn)
+
+def _row_versions(conn):
+    add_columns(conn, [MaintenanceRequest.__table__.c.version, Equipment.__table__.c.version])
+
+def _declared_indexes(conn):
+    # create_all skipped tables that already existed, so indexes declared on them later were never built
+    create_indexes(conn, model_indexes(conn, Base.metadata.sorted_tables))
+
+def _text_search(conn):
+    import search
+    if conn.dialect.name == "sqlite":
+        search.ensure_fts(conn)
+    elif conn.dialect.name == "postgresql":
+        create_indexes(conn, search.POSTGRES_INDEXES)
+
+def _request_archive(conn):
+    ArchivedRequest.__table__.create(conn, checkfirst=True)
+
+def _open_requests_index(conn):
+    # Partial (open stages only) index for overdue/due-today/upcoming; replaces the full stage+date index
+    indexes = model_indexes(conn, [MaintenanceRequest.__table__])
+    create_indexes(conn, {"ix_requests_open_stage_scheduled_date": indexes["ix_requests_open_stage_scheduled_date"]})
+    drop_indexes(conn, ["ix_requests_stage_scheduled_date"])
+
+def _stage_history(conn):
+    add_columns(conn, [MaintenanceRequest.__table__.c.stage_entered_at, ArchivedRequest.__table__.c.stage_entered_at])
+    RequestStageEvent.__table__.create(conn, checkfirst=True)
+
+def _job_schedules(conn):
+    JobSchedule.__table__.create(conn, checkfirst=True)
+
+MIGRATIONS = [
+    Migration(1, "initial schema", _initial_schema),
+    Migration(2, "row version columns", _row_versions),
+    Migration(3, "declared indexes", _declared_indexes),
+    Migration(4, "full-text search", _text_search),
+    Migration(5, "request archive", _request_archive),
+    Migration(6, "open requests index", _open_requests_index),
+    Migration(7, "stage history", _stage_history),
+    Migration(8, "job schedules", _job_schedules),
+]
+HEAD = MIGRATIONS[-1].version
+
+# --- Runner ---
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table(SchemaMigration.__tablename__):
+        return 0
+    return conn.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+
+@contextmanager
+def _migration_lock(conn):
+    # SQLite needs none: every step runs in a BEGIN IMMEDIATE transaction, which already
+    # serializes processes, and re-reads the version first
+    if conn.dialect.name != "postgresql":
+        yield
+        return
+    conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": POSTGRES_LOCK_KEY})
+    conn.commit()
+    try:
+        yield
+    finally:
+        conn.rollback()
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": POSTGRES_LOCK_KEY})
+        conn.commit()
+
+def _begin(conn):
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+def upgrade(engine) -> int:
+    """Apply the pending steps, one transaction each, and return the schema version."""
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        version = current_version(conn)
+        conn.rollback()
+        if version < HEAD:
+            with _migration_lock(conn):
+                while True:
+                    _begin(conn)
+                    version = current_version(conn)
+                    pending = [step for step in MIGRATIONS if step.version > version]
+                    if not pending:
+                        conn.commit()
+                        break
+                    step, step_started = pending[0], time.perf_counter()
+                    step.apply(conn)
+                    conn.execute(insert(SchemaMigration).values(version=step.version, name=step.name, applied_at=datetime.utcnow()))
+                    conn.commit()
+                    logger.info("Applied migration %d (%s) in %.0f ms", step.version, step.name, (time.perf_counter() - step_started) * 1000)
+    if version > HEAD:
+        logger.warning("Database schema is at version %d, newer than this build (%d)", version, HEAD)
+    logger.info("Schema at version %d (checked in %.1f ms)", version, (time.perf_counter() - started) * 1000)
+    return version
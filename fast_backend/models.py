@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, Float, ForeignKey, Enum as SQLEnum, JSON, Table, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, Date, Float, ForeignKey, Enum as SQLEnum, JSON, Table, DateTime, Text, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -24,12 +24,20 @@ class RequestStage(str, enum.Enum):
     repaired = 'Repaired'
     scrap = 'Scrap'
 
+# Stages that still need work
+OPEN_STAGES = (RequestStage.new, RequestStage.in_progress)
+
 class RequestPriority(str, enum.Enum):
     low = 'Low'
     normal = 'Normal'
     high = 'High'
     critical = 'Critical'
 
+class PlanIntervalUnit(str, enum.Enum):
+    days = 'Days'
+    weeks = 'Weeks'
+    runtime_hours = 'Runtime Hours'
+
 # --- Association Table for Team Members ---
 team_members = Table(
     'team_members',
@@ -88,12 +96,16 @@ class Equipment(Base):
     purchase_date = Column(Date, nullable=True)
     warranty_end = Column(Date, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Optimistic concurrency: ORM flushes UPDATE ... WHERE id = ? AND version = ?, Core writes bump it themselves
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
 
     # Relationships
     team = relationship("MaintenanceTeam", back_populates="equipments")
     assigned_technician = relationship("User", back_populates="assigned_equipment")
     requests = relationship("MaintenanceRequest", back_populates="equipment")
 
+    __mapper_args__ = {"version_id_col": version}
+
 class MaintenanceRequest(Base):
     __tablename__ = "maintenance_requests"
 
@@ -114,6 +126,9 @@ class MaintenanceRequest(Base):
     close_date = Column(DateTime, nullable=True)
     duration_hours = Column(Float, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # When the current stage was entered (NULL: still in the stage it was created in, since created_at)
+    stage_entered_at = Column(DateTime, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
 
     # Relationships
     equipment = relationship("Equipment", back_populates="requests")
@@ -121,3 +136,199 @@ class MaintenanceRequest(Base):
     technician = relationship("User", foreign_keys=[technician_id], back_populates="requests_assigned")
     created_by = relationship("User", foreign_keys=[created_by_id], back_populates="requests_created")
 
+    # Composite indexes for the filtered, keyset-paginated list (WHERE <filters> AND id > :cursor ORDER BY id)
+    __table_args__ = (
+        Index("ix_requests_stage_id", "stage", "id"),
+        Index("ix_requests_team_stage_id", "team_id", "stage", "id"),
+        Index("ix_requests_technician_stage_id", "technician_id", "stage", "id"),
+        Index("ix_requests_equipment_id_id", "equipment_id", "id"),
+        Index("ix_requests_scheduled_date_id", "scheduled_date", "id"),
+        Index("ix_requests_created_at_id", "created_at", "id"),
+        Index("ix_requests_team_scheduled_date", "team_id", "scheduled_date"),
+        # Open work by due date (overdue, due today, upcoming). Partial, so it holds only the open rows;
+        # the planner uses it only for queries spelling the same literal predicate (overdue.is_open)
+        Index(
+            "ix_requests_open_stage_scheduled_date", "stage", "scheduled_date",
+            sqlite_where=stage.in_(OPEN_STAGES), postgresql_where=stage.in_(OPEN_STAGES),
+        ),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+# --- Archive of closed requests (moved by archive.py) ---
+
+class ArchivedRequest(Base):
+    """A Repaired/Scrap request moved out of maintenance_requests after ARCHIVE_AFTER_DAYS.
+
+    Same columns and ids as the hot table. Rows are frozen history, so there are no foreign keys;
+    the relationships are view-only, with the hot model's names so ?expand= reads both alike.
+    """
+    __tablename__ = "maintenance_requests_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    subject = Column(String, nullable=False)
+    req_type = Column(SQLEnum(RequestType), nullable=False)
+    stage = Column(SQLEnum(RequestStage))
+    priority = Column(SQLEnum(RequestPriority))
+    equipment_id = Column(Integer)
+    team_id = Column(Integer)
+    technician_id = Column(Integer)
+    created_by_id = Column(Integer)
+    scheduled_date = Column(DateTime)
+    close_date = Column(DateTime)
+    duration_hours = Column(Float)
+    created_at = Column(DateTime(timezone=True))
+    stage_entered_at = Column(DateTime)
+    version = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
+
+    equipment = relationship("Equipment", primaryjoin="foreign(ArchivedRequest.equipment_id) == Equipment.id", viewonly=True)
+    team = relationship("MaintenanceTeam", primaryjoin="foreign(ArchivedRequest.team_id) == MaintenanceTeam.id", viewonly=True)
+    technician = relationship("User", primaryjoin="foreign(ArchivedRequest.technician_id) == User.id", viewonly=True)
+    created_by = relationship("User", primaryjoin="foreign(ArchivedRequest.created_by_id) == User.id", viewonly=True)
+
+    # The list reads the archive by date range (and the rebuilds per equipment), always ordered by id
+    __table_args__ = (
+        Index("ix_requests_archive_created_at_id", "created_at", "id"),
+        Index("ix_requests_archive_scheduled_date_id", "scheduled_date", "id"),
+        Index("ix_requests_archive_equipment_id_id", "equipment_id", "id"),
+    )
+
+# --- Stage history (written behind the request by stage_log.py) ---
+
+class RequestStageEvent(Base):
+    """One stage transition, append-only.
+
+    Team and technician are copied from the request at the time of the move, and entered_at is
+    when the request entered from_stage, so time-in-stage reports group this table alone.
+    No foreign keys: the log outlives archived and deleted requests.
+    """
+    __tablename__ = "request_stage_events"
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, nullable=False)
+    from_stage = Column(SQLEnum(RequestStage), nullable=False)
+    to_stage = Column(SQLEnum(RequestStage), nullable=False)
+    actor_id = Column(Integer, nullable=True)
+    team_id = Column(Integer, nullable=True)
+    technician_id = Column(Integer, nullable=True)
+    entered_at = Column(DateTime, nullable=True)
+    at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stage_events_request_id_id", "request_id", "id"),
+        Index("ix_stage_events_at", "at"),
+    )
+
+# --- Reporting Counters (maintained incrementally by Service) ---
+
+class StatCounter(Base):
+    """One running count per (dimension, key), e.g. ('request_stage', 'New')."""
+    __tablename__ = "stat_counters"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class EquipmentRequestCount(Base):
+    __tablename__ = "equipment_request_counts"
+
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), primary_key=True)
+    request_count = Column(Integer, nullable=False, default=0, index=True)
+
+class RequestDailyRollup(Base):
+    """Number of requests that entered a stage on a given day, per team."""
+    __tablename__ = "request_daily_rollups"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    team_id = Column(Integer, ForeignKey("maintenance_teams.id", ondelete="SET NULL"), nullable=True)
+    stage = Column(SQLEnum(RequestStage), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "team_id", "stage", name="uq_daily_rollup_day_team_stage"),
+    )
+
+class ReliabilityRollup(Base):
+    """Closed-request totals behind MTTR/MTBF, per asset and per category/team (see reliability.py)."""
+    __tablename__ = "reliability_rollups"
+
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    closed = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    # Failures with a close_date, i.e. with a measurable repair time
+    repairs = Column(Integer, nullable=False, default=0)
+    repair_hours = Column(Float, nullable=False, default=0.0)
+    cost_hours = Column(Float, nullable=False, default=0.0)
+    # Failure timeline: set on equipment rows; span and intervals are summed into group rows
+    first_failure_at = Column(DateTime, nullable=True)
+    last_failure_at = Column(DateTime, nullable=True)
+    failure_span_hours = Column(Float, nullable=False, default=0.0)
+    failure_intervals = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_reliability_scope_failures", "scope", "failures"),
+    )
+
+
+# --- Recurring Preventive Maintenance ---
+
+class PreventivePlan(Base):
+    __tablename__ = "preventive_plans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, index=True)
+    subject = Column(String, nullable=False)
+    priority = Column(SQLEnum(RequestPriority), default=RequestPriority.normal)
+    duration_hours = Column(Float, default=0.0)
+    team_id = Column(Integer, ForeignKey("maintenance_teams.id", ondelete="SET NULL"), nullable=True)
+    technician_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    interval_value = Column(Integer, nullable=False)
+    interval_unit = Column(SQLEnum(PlanIntervalUnit), nullable=False, default=PlanIntervalUnit.days)
+    # Expected runtime per calendar day, used to turn runtime-hour intervals into due dates
+    daily_runtime_hours = Column(Float, nullable=False, default=24.0)
+
+    # Next occurrence not yet materialized; advanced in the same transaction as the generated rows
+    next_due = Column(DateTime, nullable=False)
+    active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_preventive_plans_active_next_due", "active", "next_due"),
+    )
+
+class PreventiveOccurrence(Base):
+    """One materialized plan occurrence; the unique key makes generation idempotent."""
+    __tablename__ = "preventive_occurrences"
+
+    id = Column(Integer, primary_key=True)
+    plan_id = Column(Integer, ForeignKey("preventive_plans.id", ondelete="CASCADE"), nullable=False)
+    due_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("plan_id", "due_at", name="uq_preventive_occurrence_plan_due"),
+    )
+
+
+# --- Schema versioning (see migrations.py) ---
+
+class SchemaMigration(Base):
+    """One row per applied migration; the highest version is the schema's version."""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False)
+
+# --- Background jobs (see jobs.py) ---
+
+class JobSchedule(Base):
+    """When a periodic job (preventive scheduler, archiver) is next due, shared by every worker."""
+    __tablename__ = "job_schedules"
+
+    name = Column(String, primary_key=True)
+    next_run_at = Column(DateTime, nullable=False)
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,40 @@
+import os
+from datetime import datetime
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+from models import MaintenanceRequest, OPEN_STAGES
+import events
+
+# Seconds between sweeps for requests that just went overdue (0 disables the background sweep)
+SWEEP_INTERVAL_SECONDS = int(os.getenv("OVERDUE_SWEEP_INTERVAL", "60"))
+
+def is_open():
+    """stage IN ('new', 'in_progress'), rendered with literal values.
+
+    The planner only uses ix_requests_open_stage_scheduled_date when the query repeats the index's
+    predicate; with bound parameters it cannot tell, and falls back to a scan of every stage=? row.
+    """
+    return MaintenanceRequest.stage.in_(bindparam("open_stages", list(OPEN_STAGES), expanding=True, literal_execute=True))
+
+def sweep(db: Session, since: datetime, now: datetime) -> int:
+    """Publish request.overdue for open requests whose scheduled date fell in [since, now).
+
+    Each sweep picks up where the previous one stopped, so a request is announced once per
+    process (every worker sweeps for its own subscribers) and the read is one index range scan.
+    """
+    r = MaintenanceRequest
+    rows = db.execute(
+        select(r.id, r.stage, r.priority, r.team_id, r.technician_id, r.equipment_id, r.version, r.scheduled_date)
+        .where(is_open(), r.scheduled_date >= since, r.scheduled_date < now)
+        .order_by(r.scheduled_date, r.id)
+    ).all()
+    for row in rows:
+        events.broker.publish(events.request_event("request.overdue", row, scheduled_date=row.scheduled_date.isoformat()))
+    return len(rows)
+
+def run_once(session_factory, since: datetime, now: datetime) -> int:
+    db = session_factory()
+    try:
+        return sweep(db, since, now)
+    finally:
+        db.close()
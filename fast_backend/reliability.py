@@ -0,0 +1,253 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from models import ArchivedRequest, Equipment, MaintenanceRequest, MaintenanceTeam, ReliabilityRollup, RequestStage, RequestType
+import archive
+import counters
+
+CLOSED_STAGES = (RequestStage.repaired, RequestStage.scrap)
+
+# Rollup scopes. Equipment rows are the source of truth; category and team rows are the sums of
+# their assets' rows (team = the equipment's maintenance team), kept in step through deltas.
+EQUIPMENT = "equipment"
+CATEGORY = "category"
+TEAM = "team"
+
+# Additive columns, i.e. everything a group row sums over its assets
+TOTALS = ("closed", "failures", "repairs", "repair_hours", "cost_hours", "failure_span_hours", "failure_intervals")
+
+IN_CHUNK_SIZE = 500
+
+# One request entering (sign=1) or leaving (sign=-1) Repaired/Scrap
+Closure = namedtuple("Closure", "equipment_id req_type created_at close_date duration_hours sign")
+
+def is_closed(stage) -> bool:
+    return RequestStage(stage) in CLOSED_STAGES
+
+def closure(req, sign: int, close_date=None) -> Closure:
+    """`req` is an ORM object or row; close_date overrides the one it carries (e.g. just cleared on reopen)."""
+    return Closure(req.equipment_id, req.req_type, req.created_at, close_date or req.close_date, req.duration_hours, sign)
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at is timezone-aware on Postgres and naive UTC on SQLite; close_date is naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _hours(start, end) -> float:
+    return (_utc(end) - _utc(start)).total_seconds() / 3600
+
+def _chunks(items: list, size: int = IN_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _empty() -> dict:
+    return {**dict.fromkeys(TOTALS, 0), "first_failure_at": None, "last_failure_at": None}
+
+def _timeline(state: dict):
+    first, last = state["first_failure_at"], state["last_failure_at"]
+    state["failure_span_hours"] = _hours(first, last) if first and last else 0.0
+    state["failure_intervals"] = max(state["failures"] - 1, 0)
+
+def _groups(category: Optional[str], team_id: Optional[int]) -> list:
+    groups = [(CATEGORY, category or counters.UNCATEGORIZED)]
+    if team_id is not None:
+        groups.append((TEAM, str(team_id)))
+    return groups
+
+def _bump_group(db: Session, scope: str, key: str, delta: dict):
+    if not any(delta.values()):
+        return
+    counters.add_to_row(db, ReliabilityRollup, ["scope", "key"], {"scope": scope, "key": key, **delta})
+
+# --- Incremental maintenance (called by Service inside the write's transaction) ---
+
+def apply(db: Session, closures: list):
+    """Fold closures into the asset rows, then push each asset's change into its category/team rows.
+
+    Runs after the stage change itself is applied, so a reopened failure can re-derive its
+    asset's first/last failure from the requests that are still closed.
+    """
+    by_equipment = defaultdict(list)
+    for item in closures:
+        if item.equipment_id is not None:
+            by_equipment[item.equipment_id].append(item)
+    if not by_equipment:
+        return
+
+    table = ReliabilityRollup.__table__
+    ids = list(by_equipment)
+    current, groups = {}, {}
+    for chunk in _chunks(ids):
+        # FOR UPDATE (a no-op on SQLite, where the write lock is already held) keeps Postgres writers in line
+        for row in db.execute(
+            select(table).where(table.c.scope == EQUIPMENT, table.c.key.in_([str(eq_id) for eq_id in chunk])).with_for_update()
+        ):
+            current[int(row.key)] = {name: getattr(row, name) for name in TOTALS + ("first_failure_at", "last_failure_at")}
+        for eq_id, category, team_id in db.execute(
+            select(Equipment.id, Equipment.category, Equipment.assigned_team_id).where(Equipment.id.in_(chunk))
+        ):
+            groups[eq_id] = _groups(category, team_id)
+
+    group_deltas = defaultdict(lambda: dict.fromkeys(TOTALS, 0))
+    for eq_id, items in by_equipment.items():
+        old = current.get(eq_id) or _empty()
+        new = dict(old)
+        reopened_failure = False
+        for item in items:
+            new["closed"] += item.sign
+            new["cost_hours"] += item.sign * (item.duration_hours or 0.0)
+            if RequestType(item.req_type) != RequestType.corrective:
+                continue
+            new["failures"] += item.sign
+            if item.close_date and item.created_at:
+                new["repairs"] += item.sign
+                new["repair_hours"] += item.sign * max(_hours(item.created_at, item.close_date), 0.0)
+            if item.sign < 0:
+                reopened_failure = True
+            elif item.created_at:
+                at = _utc(item.created_at)
+                new["first_failure_at"] = min(filter(None, (new["first_failure_at"], at)))
+                new["last_failure_at"] = max(filter(None, (new["last_failure_at"], at)))
+        if reopened_failure:
+            # Min/max cannot be undone, so re-read them (one indexed probe of this asset's requests,
+            # hot and archived)
+            bounds = [
+                db.execute(
+                    select(func.min(model.created_at), func.max(model.created_at)).where(
+                        model.equipment_id == eq_id,
+                        model.req_type == RequestType.corrective,
+                        model.stage.in_(CLOSED_STAGES),
+                    )
+                ).one()
+                for model in (MaintenanceRequest, ArchivedRequest)
+            ]
+            firsts = [_utc(first) for first, _ in bounds if first is not None]
+            lasts = [_utc(last) for _, last in bounds if last is not None]
+            new["first_failure_at"], new["last_failure_at"] = min(firsts, default=None), max(lasts, default=None)
+        _timeline(new)
+
+        if eq_id in current:
+            db.execute(update(table).where(table.c.scope == EQUIPMENT, table.c.key == str(eq_id)).values(**new))
+        else:
+            db.execute(insert(table).values(scope=EQUIPMENT, key=str(eq_id), **new))
+        for group in groups.get(eq_id, ()):
+            delta = group_deltas[group]
+            for name in TOTALS:
+                delta[name] += new[name] - old[name]
+
+    for (scope, key), delta in group_deltas.items():
+        _bump_group(db, scope, key, delta)
+
+def on_requests_imported(db: Session, rows: list):
+    """Bulk inserts (rows are column dicts): the ones imported already closed count right away."""
+    apply(db, [
+        Closure(row["equipment_id"], row["req_type"], row["created_at"], row["close_date"], row["duration_hours"], 1)
+        for row in rows if is_closed(row["stage"])
+    ])
+
+def on_equipment_regrouped(db: Session, equipment_id: int, old: tuple, new: tuple):
+    """Move an asset's totals when its (category, team_id) changes."""
+    if old == new:
+        return
+    table = ReliabilityRollup.__table__
+    row = db.execute(select(table).where(table.c.scope == EQUIPMENT, table.c.key == str(equipment_id))).first()
+    if row is None:
+        return
+    totals = {name: getattr(row, name) for name in TOTALS}
+    for scope, key in _groups(*old):
+        _bump_group(db, scope, key, {name: -value for name, value in totals.items()})
+    for scope, key in _groups(*new):
+        _bump_group(db, scope, key, totals)
+
+# --- Backfill ---
+
+def hours_sql(db: Session, start, end):
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 24
+    return func.extract("epoch", end - start) / 3600
+
+def rebuild(db: Session):
+    """Recompute every rollup from the closed requests (archived included): one GROUP BY per asset, groups summed in Python."""
+    db.execute(delete(ReliabilityRollup))
+
+    r = archive.history("equipment_id", "stage", "req_type", "created_at", "close_date", "duration_hours").c
+    corrective = r.req_type == RequestType.corrective
+    timed = corrective & r.close_date.isnot(None) & r.created_at.isnot(None)
+    hours = hours_sql(db, r.created_at, r.close_date)
+    per_asset = db.execute(
+        select(
+            r.equipment_id,
+            Equipment.category,
+            Equipment.assigned_team_id,
+            func.count(),
+            func.sum(case((corrective, 1), else_=0)),
+            func.sum(case((timed, 1), else_=0)),
+            func.sum(case((timed & (hours > 0), hours), else_=0.0)),
+            func.sum(func.coalesce(r.duration_hours, 0.0)),
+            func.min(case((corrective, r.created_at))),
+            func.max(case((corrective, r.created_at))),
+        )
+        .join(Equipment, Equipment.id == r.equipment_id)
+        .where(r.stage.in_(CLOSED_STAGES))
+        .group_by(r.equipment_id, Equipment.category, Equipment.assigned_team_id)
+    ).all()
+
+    rows, group_totals = [], defaultdict(lambda: dict.fromkeys(TOTALS, 0))
+    for eq_id, category, team_id, closed, failures, repairs, repair_hours, cost_hours, first, last in per_asset:
+        state = {
+            "closed": closed, "failures": failures, "repairs": repairs,
+            "repair_hours": float(repair_hours or 0.0), "cost_hours": float(cost_hours or 0.0),
+            "first_failure_at": _utc(first), "last_failure_at": _utc(last),
+        }
+        _timeline(state)
+        rows.append({"scope": EQUIPMENT, "key": str(eq_id), **state})
+        for group in _groups(category, team_id):
+            for name in TOTALS:
+                group_totals[group][name] += state[name]
+    rows.extend({"scope": scope, "key": key, **totals, "first_failure_at": None, "last_failure_at": None}
+                for (scope, key), totals in group_totals.items())
+
+    for chunk in _chunks(rows, 10_000):
+        db.execute(insert(ReliabilityRollup), chunk)
+    db.commit()
+
+def ensure_built(db: Session):
+    """Backfill once for databases that have closed requests but predate the rollups."""
+    if db.query(ReliabilityRollup.scope).first() is None and (
+        db.query(MaintenanceRequest.id).filter(MaintenanceRequest.stage.in_(CLOSED_STAGES)).first() is not None
+    ):
+        rebuild(db)
+
+# --- Reads ---
+
+def _stats(row, name: Optional[str]) -> dict:
+    return {
+        "scope": row.scope,
+        "key": row.key,
+        "name": name,
+        "closed": row.closed,
+        "failures": row.failures,
+        "cost_hours": round(row.cost_hours, 2),
+        "mttr_hours": round(row.repair_hours / row.repairs, 2) if row.repairs else None,
+        "mtbf_hours": round(row.failure_span_hours / row.failure_intervals, 2) if row.failure_intervals else None,
+        "first_failure_at": row.first_failure_at,
+        "last_failure_at": row.last_failure_at,
+    }
+
+def report(db: Session, scope: str, key: Optional[str] = None, limit: int = 100) -> list:
+    """Rollup rows of one scope, most failures first; with `key`, the single row (a primary-key probe)."""
+    query = db.query(ReliabilityRollup).filter(ReliabilityRollup.scope == scope)
+    if key is not None:
+        query = query.filter(ReliabilityRollup.key == key)
+    rows = query.order_by(ReliabilityRollup.failures.desc(), ReliabilityRollup.key).limit(limit).all()
+
+    names = {}
+    ids = [int(row.key) for row in rows if row.key.isdigit()]
+    if ids and scope == EQUIPMENT:
+        names = {str(i): n for i, n in db.query(Equipment.id, Equipment.name).filter(Equipment.id.in_(ids))}
+    elif ids and scope == TEAM:
+        names = {str(i): n for i, n in db.query(MaintenanceTeam.id, MaintenanceTeam.name).filter(MaintenanceTeam.id.in_(ids))}
+    return [_stats(row, row.key if scope == CATEGORY else names.get(row.key)) for row in rows]
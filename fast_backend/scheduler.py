@@ -0,0 +1,139 @@
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import (
+    Equipment, MaintenanceRequest, PreventivePlan, PreventiveOccurrence,
+    EquipmentStatus, PlanIntervalUnit, RequestStage, RequestType,
+)
+import counters
+import events
+import workload
+
+logger = logging.getLogger(__name__)
+
+# How far ahead occurrences are materialized, and how many rows go into one transaction
+HORIZON_DAYS = int(os.getenv("PREVENTIVE_HORIZON_DAYS", "90"))
+BATCH_SIZE = int(os.getenv("PREVENTIVE_BATCH_SIZE", "5000"))
+# Seconds between background runs (0 disables the background loop)
+RUN_INTERVAL_SECONDS = int(os.getenv("PREVENTIVE_RUN_INTERVAL", "3600"))
+
+def interval_of(plan) -> timedelta:
+    if plan.interval_unit == PlanIntervalUnit.weeks:
+        return timedelta(weeks=plan.interval_value)
+    if plan.interval_unit == PlanIntervalUnit.runtime_hours:
+        # Runtime hours accrue at daily_runtime_hours per calendar day
+        per_day = plan.daily_runtime_hours or 24.0
+        return timedelta(days=plan.interval_value / per_day)
+    return timedelta(days=plan.interval_value)
+
+def _load_plans(db: Session, horizon_end: datetime):
+    """Active plans with an occurrence due inside the horizon, with their equipment defaults."""
+    return (
+        db.query(
+            PreventivePlan.id,
+            PreventivePlan.equipment_id,
+            PreventivePlan.subject,
+            PreventivePlan.priority,
+            PreventivePlan.duration_hours,
+            PreventivePlan.team_id,
+            PreventivePlan.technician_id,
+            PreventivePlan.interval_value,
+            PreventivePlan.interval_unit,
+            PreventivePlan.daily_runtime_hours,
+            PreventivePlan.next_due,
+            Equipment.assigned_team_id,
+            Equipment.assigned_technician_id,
+        )
+        .join(Equipment, Equipment.id == PreventivePlan.equipment_id)
+        .filter(
+            PreventivePlan.active.is_(True),
+            PreventivePlan.next_due <= horizon_end,
+            Equipment.status != EquipmentStatus.scrapped,
+        )
+        .all()
+    )
+
+def _flush(db: Session, rows: list, due: list, next_due: dict):
+    """Insert one batch of requests + occurrences and advance the plans, all in one transaction."""
+    # Plain multi-row inserts: no per-row RETURNING, which SQLite can only do one statement per row
+    db.execute(insert(MaintenanceRequest.__table__), rows)
+    db.execute(insert(PreventiveOccurrence.__table__), [{"plan_id": plan_id, "due_at": due_at} for plan_id, due_at in due])
+    plans = PreventivePlan.__table__
+    db.execute(
+        update(plans).where(plans.c.id == bindparam("plan_id")).values(next_due=bindparam("due")),
+        [{"plan_id": plan_id, "due": value} for plan_id, value in next_due.items()],
+    )
+    counters.on_requests_imported(db, rows)
+    workload.on_requests_created(db, rows)
+    events.publish_on_commit(db, {"type": "requests.imported", "count": len(rows)})
+    db.commit()
+
+def materialize(db: Session, horizon_days: int = HORIZON_DAYS, batch_size: int = BATCH_SIZE,
+                now: Optional[datetime] = None) -> dict:
+    """Generate every occurrence due before now + horizon_days.
+
+    Plans sit in a min-heap keyed by next due time, so occurrences come out in time order and
+    each plan costs O(log plans) per occurrence. Each batch commits its rows together with the
+    advanced next_due values; rerunning after a crash resumes where the last commit left off.
+    """
+    now = now or datetime.now()
+    horizon_end = now + timedelta(days=horizon_days)
+    plans = {plan.id: plan for plan in _load_plans(db, horizon_end)}
+
+    heap = [(plan.next_due, plan.id) for plan in plans.values()]
+    heapq.heapify(heap)
+
+    rows, due, next_due = [], [], {}
+    generated = batches = 0
+    created_at = datetime.utcnow()
+    while heap and heap[0][0] <= horizon_end:
+        due_at, plan_id = heapq.heappop(heap)
+        plan = plans[plan_id]
+        rows.append({
+            "subject": plan.subject,
+            "equipment_id": plan.equipment_id,
+            "req_type": RequestType.preventive,
+            "priority": plan.priority,
+            "scheduled_date": due_at,
+            "duration_hours": plan.duration_hours,
+            "stage": RequestStage.new,
+            "team_id": plan.team_id or plan.assigned_team_id,
+            "technician_id": plan.technician_id or plan.assigned_technician_id,
+            "created_by_id": None,
+            "close_date": None,
+            "created_at": created_at,
+        })
+        due.append((plan_id, due_at))
+        following = due_at + interval_of(plan)
+        next_due[plan_id] = following
+        heapq.heappush(heap, (following, plan_id))
+
+        if len(rows) >= batch_size:
+            _flush(db, rows, due, next_due)
+            generated += len(rows)
+            batches += 1
+            rows, due, next_due = [], [], {}
+
+    if rows:
+        _flush(db, rows, due, next_due)
+        generated += len(rows)
+        batches += 1
+
+    return {"plans": len(plans), "generated": generated, "batches": batches, "horizon_end": horizon_end}
+
+def run_once(session_factory, horizon_days: int = HORIZON_DAYS) -> Optional[dict]:
+    db = session_factory()
+    try:
+        return materialize(db, horizon_days)
+    except IntegrityError:
+        # Another worker materialized the same occurrences first; its commit wins
+        db.rollback()
+        logger.info("Preventive scheduler run skipped: occurrences already generated concurrently")
+        return None
+    finally:
+        db.close()
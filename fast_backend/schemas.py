@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import date, datetime
 from enum import Enum
 
@@ -29,6 +29,37 @@ class RequestPriority(str, Enum):
     high = 'High'
     critical = 'Critical'
 
+class PlanIntervalUnit(str, Enum):
+    days = 'Days'
+    weeks = 'Weeks'
+    runtime_hours = 'Runtime Hours'
+
+class AssignmentMode(str, Enum):
+    equipment = 'equipment'
+    least_loaded = 'least_loaded'
+
+class SearchKind(str, Enum):
+    all = 'all'
+    equipment = 'equipment'
+    request = 'request'
+
+class SearchSort(str, Enum):
+    relevance = 'relevance'
+    recent = 'recent'
+
+class CycleTimeGroup(str, Enum):
+    team = "team"
+    technician = "technician"
+
+class ReliabilityScope(str, Enum):
+    equipment = "equipment"
+    category = "category"
+    team = "team"
+
+class ExportFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
+
 # --- User Schemas ---
 class UserBase(BaseModel):
     email: str
@@ -73,11 +104,24 @@ class EquipmentCreate(EquipmentBase):
     assigned_team_id: Optional[int] = None
     assigned_technician_id: Optional[int] = None
 
+class EquipmentUpdate(BaseModel):
+    # Partial update: only the fields sent are changed
+    name: Optional[str] = None
+    serial_number: Optional[str] = None
+    category: Optional[str] = None
+    location: Optional[str] = None
+    status: Optional[EquipmentStatus] = None
+    purchase_date: Optional[date] = None
+    warranty_end: Optional[date] = None
+    assigned_team_id: Optional[int] = None
+    assigned_technician_id: Optional[int] = None
+
 class Equipment(EquipmentBase):
     id: int
     assigned_team_id: Optional[int]
     assigned_technician_id: Optional[int]
     created_at: Optional[datetime]
+    version: int
 
     class Config:
         from_attributes = True
@@ -96,6 +140,14 @@ class MaintenanceRequestCreate(MaintenanceRequestBase):
     team_id: Optional[int] = None
     technician_id: Optional[int] = None
     created_by_id: Optional[int] = None # In real app, from token
+    # How to pick the technician when none is given (defaults to ASSIGNMENT_MODE); bulk imports ignore it
+    assignment: Optional[AssignmentMode] = None
+
+class MaintenanceRequestImport(MaintenanceRequestCreate):
+    # History back-fill: imported rows may already be in a later stage
+    stage: RequestStage = RequestStage.new
+    close_date: Optional[datetime] = None
+    created_at: Optional[datetime] = None
 
 class MaintenanceRequest(MaintenanceRequestBase):
     id: int
@@ -106,7 +158,218 @@ class MaintenanceRequest(MaintenanceRequestBase):
     created_by_id: Optional[int]
     close_date: Optional[datetime]
     created_at: Optional[datetime]
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+# --- Expanded Schemas (?expand=) ---
+# Slim summaries nested into list rows only for the relations the client asked for
+class UserSummary(BaseModel):
+    id: int
+    full_name: str
+    role: UserRole
+
+    class Config:
+        from_attributes = True
+
+class TeamSummary(BaseModel):
+    id: int
+    name: str
+
+    class Config:
+        from_attributes = True
+
+class EquipmentSummary(BaseModel):
+    id: int
+    name: str
+    serial_number: str
+    category: Optional[str]
+    location: Optional[str]
+    status: EquipmentStatus
+
+    class Config:
+        from_attributes = True
+
+class MaintenanceRequestExpanded(MaintenanceRequest):
+    equipment: Optional[EquipmentSummary] = None
+    team: Optional[TeamSummary] = None
+    technician: Optional[UserSummary] = None
+    created_by: Optional[UserSummary] = None
+
+class EquipmentExpanded(Equipment):
+    team: Optional[TeamSummary] = None
+    technician: Optional[UserSummary] = Field(None, validation_alias="assigned_technician")
+
+# --- Preventive Plan Schemas ---
+class PreventivePlanBase(BaseModel):
+    equipment_id: int
+    subject: str
+    priority: RequestPriority = RequestPriority.normal
+    duration_hours: float = 0.0
+    team_id: Optional[int] = None
+    technician_id: Optional[int] = None
+    interval_value: int
+    interval_unit: PlanIntervalUnit = PlanIntervalUnit.days
+    daily_runtime_hours: float = 24.0
+
+class PreventivePlanCreate(PreventivePlanBase):
+    start_date: datetime
+
+class PreventivePlan(PreventivePlanBase):
+    id: int
+    next_due: datetime
+    active: bool
+    created_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+class SchedulerRun(BaseModel):
+    plans: int
+    generated: int
+    batches: int
+    horizon_end: datetime
+
+class ArchiveRun(BaseModel):
+    archived: int
+    batches: int
+    cutoff: datetime
+
+# --- Bulk Schemas ---
+class BulkRowResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkRowResult]
+
+class StageChange(BaseModel):
+    id: int
+    stage: RequestStage
+    # The version the client last saw; the change fails for this row if the request moved on since
+    version: Optional[int] = None
+
+class StageChangeResult(BaseModel):
+    index: int
+    id: int
+    stage: Optional[RequestStage] = None
+    from_stage: Optional[RequestStage] = None
+    version: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkStageResult(BaseModel):
+    updated: int
+    failed: int
+    equipment_scrapped: int
+    results: List[StageChangeResult]
+
+# --- Calendar Schemas ---
+class CalendarEntry(BaseModel):
+    id: int
+    subject: str
+    req_type: RequestType
+    stage: RequestStage
+    priority: RequestPriority
+    scheduled_date: datetime
+    duration_hours: Optional[float]
+    equipment_id: int
+    equipment_name: Optional[str]
+    team_id: Optional[int]
+    technician_id: Optional[int]
 
     class Config:
         from_attributes = True
 
+class CalendarDay(BaseModel):
+    day: date
+    preventive: List[CalendarEntry] = []
+    corrective: List[CalendarEntry] = []
+
+class Calendar(BaseModel):
+    start: date
+    end: date
+    days: List[CalendarDay]
+    upcoming: List[CalendarEntry]
+
+# --- Report Schemas ---
+class EquipmentRequestCount(BaseModel):
+    equipment_id: int
+    name: str
+    request_count: int
+
+class ReportSummary(BaseModel):
+    total_equipment: int
+    active_equipment: int
+    total_requests: int
+    open_requests: int
+    completed_requests: int
+    overdue_requests: int
+    by_stage: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_category: Dict[str, int]
+    by_equipment_status: Dict[str, int]
+    top_equipment: List[EquipmentRequestCount]
+
+class DailyRollup(BaseModel):
+    day: date
+    team_id: Optional[int]
+    stage: RequestStage
+    count: int
+
+    class Config:
+        from_attributes = True
+
+class ReliabilityStats(BaseModel):
+    scope: ReliabilityScope
+    key: str
+    name: Optional[str] = None
+    closed: int
+    failures: int
+    cost_hours: float
+    mttr_hours: Optional[float] = None
+    mtbf_hours: Optional[float] = None
+    first_failure_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+
+class StageEvent(BaseModel):
+    id: int
+    request_id: int
+    from_stage: RequestStage
+    to_stage: RequestStage
+    actor_id: Optional[int] = None
+    team_id: Optional[int] = None
+    technician_id: Optional[int] = None
+    entered_at: Optional[datetime] = None
+    at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CycleTimeStats(BaseModel):
+    stage: RequestStage
+    key: Optional[str] = None
+    name: Optional[str] = None
+    transitions: int
+    avg_hours: float
+    min_hours: float
+    max_hours: float
+
+# --- Search Schemas ---
+class SearchHit(BaseModel):
+    type: SearchKind
+    id: int
+    title: str
+    detail: Optional[str] = None
+    status: Optional[str] = None
+    equipment_id: Optional[int] = None
+    score: float
+
+class SearchResult(BaseModel):
+    query: str
+    hits: List[SearchHit]
+    next_offset: Optional[int] = None
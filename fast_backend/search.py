@@ -0,0 +1,233 @@
+import re
+from sqlalchemy import column, text
+from sqlalchemy.orm import Session
+from sqlalchemy.types import Float
+from models import Equipment, MaintenanceRequest
+
+# Words that would make an all-terms match fail on natural phrasing ("the press with the leak")
+STOPWORDS = {"a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with"}
+MAX_TERMS = 8
+
+# Column weights for ranking: a name hit beats a serial, category or location hit, and a
+# request's own subject beats the name of its equipment
+EQUIPMENT_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+REQUEST_WEIGHTS = (4.0, 1.0)
+
+# --- Index setup ---
+# SQLite: external-content FTS5 tables over the base tables, synced by triggers, so every write
+# path (Service, bulk inserts, the scheduler, seed scripts) stays indexed. The update triggers
+# only fire for the indexed columns, so stage changes never touch the text index.
+# prefix='2 3' adds prefix indexes that make short typeahead queries cheap.
+
+SQLITE_SETUP = {
+    "equipment_fts": [
+        """CREATE VIRTUAL TABLE equipment_fts USING fts5(
+            name, serial_number, category, location,
+            content='equipment', content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER equipment_fts_insert AFTER INSERT ON equipment BEGIN
+            INSERT INTO equipment_fts(rowid, name, serial_number, category, location)
+            VALUES (new.id, new.name, new.serial_number, new.category, new.location);
+        END""",
+        """CREATE TRIGGER equipment_fts_delete AFTER DELETE ON equipment BEGIN
+            INSERT INTO equipment_fts(equipment_fts, rowid, name, serial_number, category, location)
+            VALUES ('delete', old.id, old.name, old.serial_number, old.category, old.location);
+        END""",
+        """CREATE TRIGGER equipment_fts_update AFTER UPDATE OF name, serial_number, category, location ON equipment BEGIN
+            INSERT INTO equipment_fts(equipment_fts, rowid, name, serial_number, category, location)
+            VALUES ('delete', old.id, old.name, old.serial_number, old.category, old.location);
+            INSERT INTO equipment_fts(rowid, name, serial_number, category, location)
+            VALUES (new.id, new.name, new.serial_number, new.category, new.location);
+        END""",
+    ],
+    # Requests also index their equipment's name ("oil leak hydraulic press" finds the request), which
+    # an external-content table cannot join in, so this one keeps its own copy of the text
+    "requests_fts": [
+        """CREATE VIRTUAL TABLE requests_fts USING fts5(
+            subject, equipment_name, prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER requests_fts_insert AFTER INSERT ON maintenance_requests BEGIN
+            INSERT INTO requests_fts(rowid, subject, equipment_name)
+            VALUES (new.id, new.subject, (SELECT name FROM equipment WHERE id = new.equipment_id));
+        END""",
+        """CREATE TRIGGER requests_fts_delete AFTER DELETE ON maintenance_requests BEGIN
+            DELETE FROM requests_fts WHERE rowid = old.id;
+        END""",
+        """CREATE TRIGGER requests_fts_update AFTER UPDATE OF subject, equipment_id ON maintenance_requests BEGIN
+            UPDATE requests_fts
+            SET subject = new.subject, equipment_name = (SELECT name FROM equipment WHERE id = new.equipment_id)
+            WHERE rowid = new.id;
+        END""",
+        # Renames are rare; the equipment's requests are found through ix_requests_equipment_id_id
+        """CREATE TRIGGER requests_fts_equipment_rename AFTER UPDATE OF name ON equipment BEGIN
+            UPDATE requests_fts SET equipment_name = new.name
+            WHERE rowid IN (SELECT id FROM maintenance_requests WHERE equipment_id = new.id);
+        END""",
+    ],
+}
+
+SQLITE_REBUILD = {
+    "equipment_fts": "INSERT INTO equipment_fts(equipment_fts) VALUES ('rebuild')",
+    "requests_fts": """INSERT INTO requests_fts(rowid, subject, equipment_name)
+        SELECT r.id, r.subject, e.name FROM maintenance_requests r LEFT JOIN equipment e ON e.id = r.equipment_id""",
+}
+
+# Postgres: GIN expression indexes over the same tsvector the queries use, maintained by Postgres
+# itself. An expression index cannot reach into equipment, so there requests match on subject only.
+EQUIPMENT_TSVECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(serial_number, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(location, '')), 'D')"
+)
+REQUEST_TSVECTOR = "to_tsvector('simple', subject)"
+# Built online (CONCURRENTLY) by the migration that creates them, so writes keep flowing meanwhile
+POSTGRES_INDEXES = {
+    "ix_equipment_search": f"CREATE INDEX IF NOT EXISTS ix_equipment_search ON equipment USING GIN (({EQUIPMENT_TSVECTOR}))",
+    "ix_requests_search": f"CREATE INDEX IF NOT EXISTS ix_requests_search ON maintenance_requests USING GIN (({REQUEST_TSVECTOR}))",
+}
+
+def ensure_fts(conn):
+    """SQLite: create the missing FTS5 tables and their triggers, filling each new one from its base table."""
+    existing = {name for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, statements in SQLITE_SETUP.items():
+        if table in existing:
+            continue
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(SQLITE_REBUILD[table])
+
+# --- Queries ---
+
+def terms(q: str) -> list:
+    words = re.findall(r"\w+", q.lower())
+    kept = [word for word in words if word not in STOPWORDS]
+    return (kept or words)[:MAX_TERMS]
+
+def _fts5_query(words: list) -> str:
+    # Every term must match; the last one is a prefix so results follow the user's typing.
+    # Terms are \w+ only and quoted, so no FTS5 operator can be injected.
+    return " ".join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+
+def _tsquery(words: list) -> str:
+    return " & ".join(words[:-1] + [words[-1] + ":*"])
+
+def _sqlite_hits(table: str, weights: tuple, sort: str) -> str:
+    # relevance: FTS5 scores every match with the weighted bm25 set through its rank column and keeps
+    # the best :n (ties newest first, so pages line up); recent: newest :n straight from the index,
+    # scored only for the rows returned
+    if sort == "relevance":
+        return f"""(
+            SELECT rowid, -rank AS score FROM {table}
+            WHERE {table} MATCH :q AND rank MATCH 'bm25({', '.join(map(str, weights))})'
+            ORDER BY rank, rowid DESC LIMIT :n
+        ) h"""
+    return f"""(
+        SELECT rowid, -bm25({table}, {', '.join(map(str, weights))}) AS score FROM {table}
+        WHERE {table} MATCH :q ORDER BY rowid DESC LIMIT :n
+    ) h"""
+
+def _equipment_sql(dialect: str, sort: str) -> str:
+    if dialect == "sqlite":
+        order = "h.score DESC, h.rowid DESC" if sort == "relevance" else "h.rowid DESC"
+        return f"""
+            SELECT e.id, e.name, e.serial_number, e.category, e.location, e.status, e.created_at, h.score
+            FROM {_sqlite_hits("equipment_fts", EQUIPMENT_WEIGHTS, sort)} JOIN equipment e ON e.id = h.rowid
+            ORDER BY {order} LIMIT :n"""
+    order = "score DESC, e.id DESC" if sort == "relevance" else "e.id DESC"
+    return f"""
+        SELECT e.id, e.name, e.serial_number, e.category, e.location, e.status, e.created_at,
+               ts_rank({EQUIPMENT_TSVECTOR}, to_tsquery('simple', :q)) AS score
+        FROM equipment e
+        WHERE ({EQUIPMENT_TSVECTOR}) @@ to_tsquery('simple', :q)
+        ORDER BY {order} LIMIT :n"""
+
+def _request_sql(dialect: str, sort: str) -> str:
+    if dialect == "sqlite":
+        order = "h.score DESC, h.rowid DESC" if sort == "relevance" else "h.rowid DESC"
+        return f"""
+            SELECT r.id, r.subject, r.stage, r.equipment_id, r.created_at, h.score
+            FROM {_sqlite_hits("requests_fts", REQUEST_WEIGHTS, sort)} JOIN maintenance_requests r ON r.id = h.rowid
+            ORDER BY {order} LIMIT :n"""
+    order = "score DESC, r.id DESC" if sort == "relevance" else "r.id DESC"
+    return f"""
+        SELECT r.id, r.subject, r.stage, r.equipment_id, r.created_at,
+               ts_rank({REQUEST_TSVECTOR}, to_tsquery('simple', :q)) AS score
+        FROM maintenance_requests r
+        WHERE {REQUEST_TSVECTOR} @@ to_tsquery('simple', :q)
+        ORDER BY {order} LIMIT :n"""
+
+def _normalized(hits: list) -> list:
+    # bm25 (and ts_rank) values are only comparable within one index, so scores become a fraction
+    # of that index's best hit; the best hit stays the same whatever the page, so paging is stable
+    top = max((hit["score"] for hit in hits), default=0) or 1.0
+    for hit in hits:
+        hit["score"] = hit["score"] / top
+    return hits
+
+def _equipment_hits(db: Session, dialect: str, query: str, sort: str, n: int) -> list:
+    statement = text(_equipment_sql(dialect, sort)).columns(
+        Equipment.id, Equipment.name, Equipment.serial_number, Equipment.category, Equipment.location,
+        Equipment.status, Equipment.created_at, column("score", Float),
+    )
+    return [
+        {
+            "type": "equipment",
+            "id": row.id,
+            "title": row.name,
+            "detail": " · ".join(part for part in (row.serial_number, row.category, row.location) if part),
+            "status": row.status.value if row.status else None,
+            "score": row.score,
+            "created_at": row.created_at,
+        }
+        for row in db.execute(statement, {"q": query, "n": n})
+    ]
+
+def _request_hits(db: Session, dialect: str, query: str, sort: str, n: int) -> list:
+    statement = text(_request_sql(dialect, sort)).columns(
+        MaintenanceRequest.id, MaintenanceRequest.subject, MaintenanceRequest.stage,
+        MaintenanceRequest.equipment_id, MaintenanceRequest.created_at, column("score", Float),
+    )
+    return [
+        {
+            "type": "request",
+            "id": row.id,
+            "title": row.subject,
+            "detail": None,
+            "status": row.stage.value if row.stage else None,
+            "equipment_id": row.equipment_id,
+            "score": row.score,
+            "created_at": row.created_at,
+        }
+        for row in db.execute(statement, {"q": query, "n": n})
+    ]
+
+def search(db: Session, q: str, kind: str = "all", sort: str = "relevance", limit: int = 20, offset: int = 0) -> dict:
+    """Ranked hits over equipment and request subjects, one page at a time.
+
+    Each index is asked for offset + limit + 1 hits only, and the two lists are merged by their
+    scores normalized per index (or by creation time with sort=recent); the extra row tells
+    whether another page exists.
+    """
+    words = terms(q)
+    if not words:
+        return {"query": q, "hits": [], "next_offset": None}
+    dialect = db.get_bind().dialect.name
+    query = _fts5_query(words) if dialect == "sqlite" else _tsquery(words)
+
+    n = offset + limit + 1
+    per_index = []
+    if kind in ("all", "equipment"):
+        per_index.append(_equipment_hits(db, dialect, query, sort, n))
+    if kind in ("all", "request"):
+        per_index.append(_request_hits(db, dialect, query, sort, n))
+    if sort == "relevance":
+        hits = [hit for index_hits in per_index for hit in _normalized(index_hits)]
+        # Equal scores (e.g. both indexes' best hits) keep the equipment hit first, then newest first
+        hits.sort(key=lambda hit: (-hit["score"], hit["type"] != "equipment", -hit["id"]))
+    else:
+        hits = [hit for index_hits in per_index for hit in index_hits]
+        hits.sort(key=lambda hit: (hit["created_at"] is not None, hit["created_at"]), reverse=True)
+
+    page = hits[offset:offset + limit]
+    return {"query": q, "hits": page, "next_offset": offset + limit if len(hits) > offset + limit else None}
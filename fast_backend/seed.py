@@ -1,9 +1,16 @@
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine
 import models
-from models import User, MaintenanceTeam, Equipment, MaintenanceRequest, UserRole, EquipmentStatus, RequestType, RequestStage, RequestPriority
+import counters
+import reliability
+import migrations
+from models import User, MaintenanceTeam, Equipment, MaintenanceRequest, UserRole, EquipmentStatus, RequestType, RequestStage, RequestPriority, team_members
 from datetime import date, datetime, timedelta
+from itertools import accumulate
+import argparse
 import random
+import time
 
 def seed_data():
     db = SessionLocal()
@@ -161,11 +168,190 @@ def seed_data():
 
     db.add_all(requests)
     db.commit()
+
+    # Seeded rows bypass Service, so recompute the report counters from scratch
+    counters.rebuild(db)
+    reliability.rebuild(db)
     
     print("Seeding complete! Added extensive fake data.")
     db.close()
 
+# --- Synthetic data at production scale ---
+# Same shapes as seed_data(), generated in chunks and written with Core executemany inserts.
+
+CATEGORIES = [
+    ('Heavy Machinery', 'Warehouse'), ('Production Line', 'Floor'), ('Computers', 'Server Room'),
+    ('Electrical', 'Basement'), ('HVAC', 'Roof'), ('Infrastructure', 'Lobby'), ('Safety', 'Zone'),
+]
+SUBJECTS = ['Oil Leak', 'Overheating Warning', 'Software Update', 'Filter Replacement', 'Strange Noise', 'Broken Seal', 'Routine Checkup']
+PRIORITY_WEIGHTS = {RequestPriority.low: 30, RequestPriority.normal: 45, RequestPriority.high: 20, RequestPriority.critical: 5}
+
+def _zipf_cum_weights(n: int, skew: float) -> list:
+    # Rank r gets weight 1/r^skew: a few ids take most of the traffic, like real fleets
+    return list(accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+def _insert_chunks(db: Session, table, rows, chunk_size: int, label: str):
+    chunk, total, started = [], 0, time.perf_counter()
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.execute(insert(table), chunk)
+            db.commit()
+            total += len(chunk)
+            chunk = []
+            print(f"  {label}: {total:,} rows ({total / (time.perf_counter() - started):,.0f}/s)", end="\r")
+    if chunk:
+        db.execute(insert(table), chunk)
+        db.commit()
+        total += len(chunk)
+    print(f"  {label}: {total:,} rows in {time.perf_counter() - started:.1f}s")
+
+def seed_scale(
+    teams: int = 100,
+    technicians_per_team: int = 5,
+    equipment: int = 10_000,
+    requests: int = 100_000,
+    skew: float = 1.1,
+    history_days: int = 730,
+    chunk_size: int = 10_000,
+    seed: int = 42,
+):
+    """Fill the database with synthetic data, e.g. seed_scale(1000, 5, 1_000_000, 10_000_000).
+
+    Team sizes, equipment per team and requests per equipment follow Zipf-like skew; old
+    requests are mostly closed while the last two weeks hold the open backlog.
+    """
+    rng = random.Random(seed)
+    db = SessionLocal()
+    now = datetime.now()
+
+    print("Clearing existing data...")
+    for table in reversed(models.Base.metadata.sorted_tables):
+        if table is not models.SchemaMigration.__table__:
+            db.execute(delete(table))
+    db.commit()
+
+    print(f"Generating {teams:,} teams, {equipment:,} equipment, {requests:,} requests...")
+    managers = max(1, teams // 50)
+    technicians = teams * technicians_per_team
+    _insert_chunks(db, User.__table__, (
+        {
+            "email": f"{'manager' if i < managers else 'tech'}{i}@gearguard.com",
+            "password_hash": "hashed_123",
+            "full_name": f"{'Manager' if i < managers else 'Technician'} {i}",
+            "role": UserRole.manager if i < managers else UserRole.technician,
+            "created_at": now,
+        }
+        for i in range(managers + technicians)
+    ), chunk_size, "users")
+    user_ids = list(db.scalars(select(User.id).order_by(User.id)))
+    manager_ids, tech_ids = user_ids[:managers], user_ids[managers:]
+
+    _insert_chunks(db, MaintenanceTeam.__table__, ({"name": f"Team {i}"} for i in range(teams)), chunk_size, "teams")
+    team_ids = list(db.scalars(select(MaintenanceTeam.id).order_by(MaintenanceTeam.id)))
+
+    # Every technician belongs to one team; one in ten also covers a second team
+    members = {team_id: [] for team_id in team_ids}
+    for i, tech_id in enumerate(tech_ids):
+        members[team_ids[i % teams]].append(tech_id)
+    for tech_id in rng.sample(tech_ids, len(tech_ids) // 10):
+        team_id = rng.choice(team_ids)
+        if tech_id not in members[team_id]:
+            members[team_id].append(tech_id)
+    _insert_chunks(db, team_members, (
+        {"team_id": team_id, "user_id": user_id} for team_id, users in members.items() for user_id in users
+    ), chunk_size, "team members")
+
+    team_weights = _zipf_cum_weights(teams, skew)
+    statuses = [EquipmentStatus.active] * 93 + [EquipmentStatus.maintenance] * 5 + [EquipmentStatus.scrapped] * 2
+
+    def equipment_rows():
+        for i in range(equipment):
+            team_id = rng.choices(team_ids, cum_weights=team_weights)[0]
+            category, location = rng.choice(CATEGORIES)
+            purchased = date.today() - timedelta(days=rng.randint(30, 3650))
+            yield {
+                "name": f"{category} #{i}",
+                "serial_number": f"SN-{i:09d}",
+                "category": category,
+                "location": f"{location} {rng.randint(1, 20)}",
+                "status": rng.choice(statuses),
+                "assigned_team_id": team_id,
+                "assigned_technician_id": rng.choice(members[team_id]) if members[team_id] else None,
+                "purchase_date": purchased,
+                "warranty_end": purchased + timedelta(days=3 * 365),
+                "created_at": now,
+            }
+    _insert_chunks(db, Equipment.__table__, equipment_rows(), chunk_size, "equipment")
+    fleet = db.execute(
+        select(Equipment.id, Equipment.name, Equipment.assigned_team_id, Equipment.assigned_technician_id).order_by(Equipment.id)
+    ).all()
+
+    # Shuffle before weighting so the busiest machines are spread over teams and categories
+    rng.shuffle(fleet)
+    fleet_weights = _zipf_cum_weights(len(fleet), skew)
+    priorities, priority_weights = list(PRIORITY_WEIGHTS), list(PRIORITY_WEIGHTS.values())
+
+    def request_rows():
+        for _ in range(requests):
+            eq = rng.choices(fleet, cum_weights=fleet_weights)[0]
+            created = now - timedelta(days=rng.random() * history_days)
+            scheduled = created + timedelta(days=rng.randint(0, 14))
+            duration = round(rng.uniform(0.5, 8.0), 1)
+            age_days = (now - created).days
+            if age_days > 14:
+                stage = RequestStage.scrap if rng.random() < 0.005 else RequestStage.repaired
+            else:
+                stage = rng.choice([RequestStage.new, RequestStage.new, RequestStage.in_progress, RequestStage.repaired])
+            closed = stage in (RequestStage.repaired, RequestStage.scrap)
+            req_type = RequestType.preventive if rng.random() < 0.4 else RequestType.corrective
+            yield {
+                "subject": f"{rng.choice(SUBJECTS)} - {eq.name}",
+                "equipment_id": eq.id,
+                "req_type": req_type,
+                "priority": rng.choices(priorities, priority_weights)[0],
+                "scheduled_date": scheduled,
+                "duration_hours": duration,
+                "stage": stage,
+                "team_id": eq.assigned_team_id,
+                "technician_id": eq.assigned_technician_id,
+                "created_by_id": rng.choice(manager_ids),
+                "close_date": scheduled + timedelta(hours=duration) if closed else None,
+                "created_at": created,
+            }
+    _insert_chunks(db, MaintenanceRequest.__table__, request_rows(), chunk_size, "requests")
+
+    print("Rebuilding counters...")
+    counters.rebuild(db)
+    reliability.rebuild(db)
+    db.close()
+    print("Synthetic data complete.")
+
 if __name__ == "__main__":
-    # Ensure tables exist
-    models.Base.metadata.create_all(bind=engine)
-    seed_data()
+    parser = argparse.ArgumentParser(description="Seed the GearGuard database (small demo set by default)")
+    parser.add_argument("--scale", action="store_true", help="generate synthetic data at the volumes below")
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--technicians-per-team", type=int, default=5)
+    parser.add_argument("--equipment", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for team/equipment popularity")
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Bring the schema up to date (creates it on a fresh database)
+    migrations.upgrade(engine)
+    if args.scale:
+        seed_scale(
+            teams=args.teams,
+            technicians_per_team=args.technicians_per_team,
+            equipment=args.equipment,
+            requests=args.requests,
+            skew=args.skew,
+            history_days=args.history_days,
+            chunk_size=args.chunk_size,
+            seed=args.seed,
+        )
+    else:
+        seed_data()
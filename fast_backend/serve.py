@@ -0,0 +1,34 @@
+"""Server entry point: apply migrations once, then start the uvicorn workers.
+
+    python serve.py --workers 4 --port 8000
+
+Migrations run here, before any worker starts, so every worker boots against a current schema
+and only compares its version. This process never imports the app: the workers do.
+"""
+import argparse
+import logging
+import os
+import uvicorn
+from database import engine
+import migrations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    # Using 127.0.0.1 is safer for Windows local development
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(levelname)s:     %(message)s")
+    migrations.logger.setLevel(logging.INFO)
+    migrations.upgrade(engine)
+    # Workers open their own pools; none of this process's connections should outlive the upgrade
+    engine.dispose()
+    uvicorn.run(
+        "main:app", host=args.host, port=args.port, workers=args.workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+    )
+
+if __name__ == "__main__":
+    main()
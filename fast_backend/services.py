@@ -1,7 +1,180 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from models import Equipment, MaintenanceTeam, MaintenanceRequest, User, RequestStage, EquipmentStatus
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+from models import ArchivedRequest, Equipment, MaintenanceTeam, MaintenanceRequest, PreventivePlan, User, RequestStage, RequestType, EquipmentStatus
 import schemas
+import counters
+import cache
+import events
+import workload
+import reliability
+import archive
+import overdue
+# search and stage_log are imported where used, so only the routes that need them load them
+
+# Page size bounds for the keyset-paginated request list
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Calendar range bounds (a month view renders 42 days)
+CALENDAR_MAX_DAYS = 92
+UPCOMING_LIMIT = 10
+
+# Search pages are offset-based (ranked results have no stable key), so depth is bounded
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_OFFSET = 500
+
+# Bulk ingestion: rows accepted per call, and ids per IN (...) lookup (stays under SQLite's variable limit)
+BULK_MAX_ROWS = 10000
+IN_CHUNK_SIZE = 500
+
+NOT_A_TEAM_MEMBER = "The assigned technician must be a member of the selected Maintenance Team"
+
+# Compare-and-swap rounds for the scrap cascade before the write is rejected with 409
+SCRAP_CAS_ATTEMPTS = 3
+
+# ?expand= names and the relationships they load
+REQUEST_EXPANSIONS = {
+    "equipment": MaintenanceRequest.equipment,
+    "team": MaintenanceRequest.team,
+    "technician": MaintenanceRequest.technician,
+    "created_by": MaintenanceRequest.created_by,
+}
+ARCHIVED_REQUEST_EXPANSIONS = {name: getattr(ArchivedRequest, rel.key) for name, rel in REQUEST_EXPANSIONS.items()}
+EQUIPMENT_EXPANSIONS = {
+    "team": Equipment.team,
+    "technician": Equipment.assigned_technician,
+}
+
+# Columns for the plain-row list paths, in the order of the response schema's fields, so the
+# dicts built from them serialize to the same JSON as response_model would
+TEAM_FIELDS = tuple(schemas.MaintenanceTeam.model_fields)
+EQUIPMENT_FIELDS = tuple(schemas.Equipment.model_fields)
+REQUEST_FIELDS = tuple(schemas.MaintenanceRequest.model_fields)
+
+def _columns(model, fields: tuple) -> list:
+    return [getattr(model, name) for name in fields]
+
+def _as_dicts(fields: tuple, rows) -> list:
+    return [dict(zip(fields, row)) for row in rows]
+
+def parse_expand(value: Optional[str], allowed: dict) -> frozenset:
+    names = frozenset(name.strip() for name in (value or "").split(",") if name.strip())
+    unknown = names - allowed.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown expand value(s): {', '.join(sorted(unknown))} (allowed: {', '.join(allowed)})",
+        )
+    return names
+
+def _expand_options(expand: frozenset, allowed: dict):
+    # One SELECT ... IN per expanded relation whatever the page size; reading any other one raises
+    # instead of lazy-loading it row by row
+    return [selectinload(rel) if name in expand else raiseload(rel) for name, rel in allowed.items()]
+
+def _request_page(db: Session, model, expansions: dict, filters: dict, limit: int, expand: frozenset, plain: bool) -> list:
+    """Up to limit + 1 rows of `model` (hot or archived requests, same column names) in id order."""
+    if plain:
+        # No entity construction or identity map: the list path only reads these columns
+        query = db.query(*_columns(model, REQUEST_FIELDS))
+    else:
+        query = db.query(model)
+    if expand:
+        query = query.options(*_expand_options(expand, expansions))
+
+    if filters["stage"]:
+        query = query.filter(model.stage == filters["stage"])
+    if filters["priority"]:
+        query = query.filter(model.priority == filters["priority"])
+    if filters["req_type"]:
+        query = query.filter(model.req_type == filters["req_type"])
+    if filters["team_id"] is not None:
+        query = query.filter(model.team_id == filters["team_id"])
+    if filters["technician_id"] is not None:
+        query = query.filter(model.technician_id == filters["technician_id"])
+    if filters["equipment_id"] is not None:
+        query = query.filter(model.equipment_id == filters["equipment_id"])
+    if filters["scheduled_from"]:
+        query = query.filter(model.scheduled_date >= filters["scheduled_from"])
+    if filters["scheduled_to"]:
+        query = query.filter(model.scheduled_date < filters["scheduled_to"])
+    if filters["created_from"]:
+        query = query.filter(model.created_at >= filters["created_from"])
+    if filters["created_to"]:
+        query = query.filter(model.created_at < filters["created_to"])
+    if filters["cursor"] is not None:
+        query = query.filter(model.id > filters["cursor"])
+
+    # One extra row tells whether another page exists
+    return query.order_by(model.id).limit(limit + 1).all()
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _conflict(kind: str, obj_id: int) -> HTTPException:
+    return HTTPException(status_code=409, detail=f"{kind} {obj_id} was modified concurrently; reload and retry")
+
+def _check_version(obj, expected_version: Optional[int], kind: str):
+    # If-Match: the client's copy must still be current
+    if expected_version is not None and obj.version != expected_version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{kind} {obj.id} is at version {obj.version}, not {expected_version}; reload and retry",
+        )
+
+def _flush_versioned(db: Session, kind: str, obj_id: int):
+    # version_id_col makes the flush a compare-and-swap; zero rows matched means another writer won
+    try:
+        db.flush()
+    except StaleDataError:
+        raise _conflict(kind, obj_id)
+
+def _scrap_equipment(db: Session, equipment_ids: list) -> list:
+    """Mark equipment Scrapped with compare-and-swap UPDATEs; returns (id, old_status) per row changed.
+
+    Rows whose version moved between the read and the UPDATE are re-read and retried, so a
+    concurrent edit (or scrap) of the same machine never makes the cascade lose its write.
+    """
+    equipment = Equipment.__table__
+    scrapped, pending = [], list(equipment_ids)
+    for _ in range(SCRAP_CAS_ATTEMPTS):
+        lost = []
+        for chunk in _chunks(pending, IN_CHUNK_SIZE):
+            current = db.execute(
+                select(equipment.c.id, equipment.c.status, equipment.c.version)
+                .where(equipment.c.id.in_(chunk), equipment.c.status != EquipmentStatus.scrapped)
+            ).all()
+            if not current:
+                continue
+            won = set(db.scalars(
+                update(equipment)
+                .where(tuple_(equipment.c.id, equipment.c.version).in_([(row.id, row.version) for row in current]))
+                .values(status=EquipmentStatus.scrapped, version=equipment.c.version + 1)
+                .returning(equipment.c.id)
+            ))
+            scrapped.extend((row.id, row.status) for row in current if row.id in won)
+            lost.extend(row.id for row in current if row.id not in won)
+        if not lost:
+            return scrapped
+        pending = lost
+    raise _conflict("Equipment", pending[0])
+
+def _bulk_result(rows: list, ids: list, errors: dict, total: int):
+    """Merge inserted ids (in row order) and per-index errors into one result per input row."""
+    inserted = iter(zip(rows, ids))
+    results = []
+    for index in range(total):
+        if index in errors:
+            results.append({"index": index, "error": errors[index]})
+        else:
+            _, new_id = next(inserted)
+            results.append({"index": index, "id": new_id})
+    return {"created": len(ids), "failed": len(errors), "results": results}
 
 class Service:
     
@@ -11,12 +184,15 @@ class Service:
         # members logic removed as it requires User creation which is separate now
         db_team = MaintenanceTeam(name=team.name)
         db.add(db_team)
+        cache.invalidate_on_commit(db, cache.TEAMS)
         db.commit()
         db.refresh(db_team)
         return db_team
 
     @staticmethod
-    def get_teams(db: Session):
+    def get_teams(db: Session, plain: bool = False):
+        if plain:
+            return _as_dicts(TEAM_FIELDS, db.execute(select(*_columns(MaintenanceTeam, TEAM_FIELDS))))
         return db.query(MaintenanceTeam).all()
 
     # --- EQUIPMENT ---
@@ -24,13 +200,85 @@ class Service:
     def create_equipment(db: Session, equipment: schemas.EquipmentCreate):
         db_equipment = Equipment(**equipment.dict())
         db.add(db_equipment)
+        counters.on_equipment_created(db, db_equipment)
+        cache.invalidate_on_commit(db, cache.EQUIPMENT)
         db.commit()
         db.refresh(db_equipment)
         return db_equipment
 
     @staticmethod
-    def get_equipment(db: Session):
-        return db.query(Equipment).all()
+    def bulk_create_equipment(db: Session, items: List[schemas.EquipmentCreate]):
+        """Validate a whole batch up front, then insert the valid rows with one executemany."""
+        if len(items) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"Bulk requests are limited to {BULK_MAX_ROWS} rows")
+
+        serials = list({item.serial_number for item in items})
+        taken = set()
+        for chunk in _chunks(serials, IN_CHUNK_SIZE):
+            taken.update(s for (s,) in db.query(Equipment.serial_number).filter(Equipment.serial_number.in_(chunk)))
+
+        errors, rows, seen = {}, [], set()
+        for index, item in enumerate(items):
+            if item.serial_number in taken:
+                errors[index] = "Serial number already exists"
+            elif item.serial_number in seen:
+                errors[index] = "Duplicate serial number in batch"
+            else:
+                seen.add(item.serial_number)
+                rows.append(item.dict())
+
+        ids = []
+        if rows:
+            ids = list(db.scalars(insert(Equipment).returning(Equipment.id, sort_by_parameter_order=True), rows))
+            counters.on_equipment_imported(db, rows)
+            cache.invalidate_on_commit(db, cache.EQUIPMENT)
+            db.commit()
+        return _bulk_result(rows, ids, errors, len(items))
+
+    @staticmethod
+    def get_equipment(db: Session, expand: frozenset = frozenset(), plain: bool = False):
+        if plain:
+            return _as_dicts(EQUIPMENT_FIELDS, db.execute(select(*_columns(Equipment, EQUIPMENT_FIELDS))))
+        query = db.query(Equipment)
+        if expand:
+            query = query.options(*_expand_options(expand, EQUIPMENT_EXPANSIONS))
+        return query.all()
+
+    @staticmethod
+    def get_equipment_item(db: Session, equipment_id: int):
+        equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+        if not equipment:
+            raise HTTPException(status_code=404, detail="Equipment not found")
+        return equipment
+
+    @staticmethod
+    def update_equipment(db: Session, equipment_id: int, changes: schemas.EquipmentUpdate, expected_version: Optional[int] = None):
+        equipment = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+        if not equipment:
+            raise HTTPException(status_code=404, detail="Equipment not found")
+        _check_version(equipment, expected_version, "Equipment")
+
+        data = changes.dict(exclude_unset=True)
+        for key in ("name", "serial_number", "status"):
+            if key in data and data[key] is None:
+                raise HTTPException(status_code=400, detail=f"{key} cannot be null")
+        if "serial_number" in data and data["serial_number"] != equipment.serial_number:
+            if db.query(Equipment.id).filter(Equipment.serial_number == data["serial_number"]).first():
+                raise HTTPException(status_code=400, detail="Serial number already exists")
+        if "status" in data and data["status"] != equipment.status:
+            counters.on_equipment_status_changed(db, equipment.status, EquipmentStatus(data["status"]))
+        if "category" in data:
+            counters.on_equipment_category_changed(db, equipment.category, data["category"])
+        old_group = (equipment.category, equipment.assigned_team_id)
+        for key, value in data.items():
+            setattr(equipment, key, value)
+        reliability.on_equipment_regrouped(db, equipment_id, old_group, (equipment.category, equipment.assigned_team_id))
+
+        cache.invalidate_on_commit(db, cache.EQUIPMENT, cache.equipment_key(equipment_id))
+        _flush_versioned(db, "Equipment", equipment_id)
+        db.commit()
+        db.refresh(equipment)
+        return equipment
 
     # --- REQUESTS ---
     @staticmethod
@@ -48,12 +296,9 @@ class Service:
         if req_in.req_type == 'Preventive' and not req_in.scheduled_date:
              raise HTTPException(status_code=400, detail="Preventive requests must have a Scheduled Date")
 
-        # 4. Auto-fill Team/Tech from Equipment defaults (if assigned and not overridden)
+        # 4. Auto-fill Team from Equipment defaults (if assigned and not overridden)
         assigned_team_id = req_in.team_id if req_in.team_id else equipment.assigned_team_id
-        assigned_technician_id = req_in.technician_id if req_in.technician_id else equipment.assigned_technician_id
-        
-        # 5. Validation: Technician must be in Team (Skipping for now as we don't have easy check without Members loaded)
-        # In a real app we would check: if assigned_technician_id and assigned_team_id: verify link.
+        assigned_technician_id = Service._resolve_technician(req_in, equipment, assigned_team_id)
 
         # Create DB Object
         db_req = MaintenanceRequest(
@@ -70,28 +315,423 @@ class Service:
         )
         
         db.add(db_req)
+        db.flush()  # assigns db_req.id for the event
+        counters.on_request_created(db, db_req)
+        workload.adjust_on_commit(db, db_req.technician_id, db_req.duration_hours)
+        events.publish_on_commit(db, events.request_event("request.created", db_req, subject=db_req.subject))
         db.commit()
         db.refresh(db_req)
         return db_req
 
     @staticmethod
-    def get_requests(db: Session):
-        return db.query(MaintenanceRequest).all()
+    def _resolve_technician(req_in: schemas.MaintenanceRequestCreate, equipment: Equipment, team_id: Optional[int]):
+        """Pick the technician for a new request; membership comes from the in-memory workload index."""
+        # 5. Validation: Technician must be in Team
+        if req_in.technician_id:
+            if team_id and not workload.index.is_member(team_id, req_in.technician_id):
+                raise HTTPException(status_code=400, detail=NOT_A_TEAM_MEMBER)
+            return req_in.technician_id
+
+        # The equipment's technician is kept as is; least_loaded (opt-in) picks a team member instead
+        default = equipment.assigned_technician_id
+        mode = req_in.assignment or workload.DEFAULT_ASSIGNMENT_MODE
+        if mode != schemas.AssignmentMode.least_loaded or not team_id:
+            return default
+        return workload.index.least_loaded(team_id) or default
+
+    @staticmethod
+    def bulk_create_requests(db: Session, items: List[schemas.MaintenanceRequestImport]):
+        """Apply create_request's rules to a whole batch with one equipment lookup and one executemany."""
+        if len(items) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"Bulk requests are limited to {BULK_MAX_ROWS} rows")
+
+        equipment_ids = list({item.equipment_id for item in items})
+        equipment = {}
+        for chunk in _chunks(equipment_ids, IN_CHUNK_SIZE):
+            for row in db.query(
+                Equipment.id, Equipment.status, Equipment.assigned_team_id, Equipment.assigned_technician_id
+            ).filter(Equipment.id.in_(chunk)):
+                equipment[row.id] = row
+
+        def team_of(item):
+            eq = equipment.get(item.equipment_id)
+            return item.team_id if item.team_id else (eq.assigned_team_id if eq is not None else None)
+
+        now = datetime.utcnow()
+        errors, rows = {}, []
+        for index, item in enumerate(items):
+            eq = equipment.get(item.equipment_id)
+            if eq is None:
+                errors[index] = "Equipment not found"
+            elif eq.status == EquipmentStatus.scrapped:
+                errors[index] = "Cannot create request for scrapped equipment"
+            elif item.req_type == 'Preventive' and not item.scheduled_date:
+                errors[index] = "Preventive requests must have a Scheduled Date"
+            elif item.technician_id and team_of(item) and not workload.index.is_member(team_of(item), item.technician_id):
+                errors[index] = NOT_A_TEAM_MEMBER
+            else:
+                rows.append({
+                    "subject": item.subject,
+                    "equipment_id": item.equipment_id,
+                    "req_type": item.req_type,
+                    "priority": item.priority,
+                    "scheduled_date": item.scheduled_date,
+                    "duration_hours": item.duration_hours,
+                    "stage": item.stage,
+                    "team_id": team_of(item),
+                    "technician_id": item.technician_id if item.technician_id else eq.assigned_technician_id,
+                    "created_by_id": item.created_by_id,
+                    "close_date": item.close_date,
+                    "created_at": item.created_at or now,
+                })
+
+        ids = []
+        if rows:
+            ids = list(db.scalars(
+                insert(MaintenanceRequest).returning(MaintenanceRequest.id, sort_by_parameter_order=True), rows
+            ))
+            counters.on_requests_imported(db, rows)
+            reliability.on_requests_imported(db, rows)
+            workload.on_requests_created(db, rows)
+            # One summary event instead of one per row; boards refetch on it
+            events.publish_on_commit(db, {"type": "requests.imported", "count": len(ids)})
+            db.commit()
+        return _bulk_result(rows, ids, errors, len(items))
+
+    @staticmethod
+    def get_requests(
+        db: Session,
+        stage: Optional[schemas.RequestStage] = None,
+        priority: Optional[schemas.RequestPriority] = None,
+        req_type: Optional[schemas.RequestType] = None,
+        team_id: Optional[int] = None,
+        technician_id: Optional[int] = None,
+        equipment_id: Optional[int] = None,
+        scheduled_from: Optional[datetime] = None,
+        scheduled_to: Optional[datetime] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        cursor: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        expand: frozenset = frozenset(),
+        plain: bool = False,
+    ):
+        """Return one page of requests plus the cursor for the next page (None on the last page).
+
+        Pagination is keyset-based on the primary key: the cursor is the last id seen,
+        so every page is an index range scan no matter how deep the client has paged.
+        plain=True returns dicts built from column tuples instead of ORM objects.
+        Archived requests are read only when a created/scheduled date range reaches into the
+        archive; its rows carry their original ids, so the two pages merge by id.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        filters = dict(
+            stage=stage, priority=priority, req_type=req_type, team_id=team_id, technician_id=technician_id,
+            equipment_id=equipment_id, scheduled_from=scheduled_from, scheduled_to=scheduled_to,
+            created_from=created_from, created_to=created_to, cursor=cursor,
+        )
+        rows = _request_page(db, MaintenanceRequest, REQUEST_EXPANSIONS, filters, limit, expand, plain)
+        if archive.reaches(db, created_at=(created_from, created_to), scheduled_date=(scheduled_from, scheduled_to)):
+            archived = _request_page(db, ArchivedRequest, ARCHIVED_REQUEST_EXPANSIONS, filters, limit, expand, plain)
+            rows = sorted(rows + archived, key=lambda row: row.id)[:limit + 1]
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        rows = rows[:limit]
+        return (_as_dicts(REQUEST_FIELDS, rows) if plain else rows), next_cursor
 
     @staticmethod
-    def change_stage(db: Session, req_id: int, new_stage: schemas.RequestStage):
+    def change_stage(db: Session, req_id: int, new_stage: schemas.RequestStage, expected_version: Optional[int] = None,
+                     actor_id: Optional[int] = None):
         req = db.query(MaintenanceRequest).filter(MaintenanceRequest.id == req_id).first()
         if not req:
+            if archive.archived_ids(db, [req_id]):
+                raise HTTPException(status_code=409, detail=f"Request {req_id} is archived; archived requests are read-only")
             raise HTTPException(status_code=404, detail="Request not found")
-        
+        _check_version(req, expected_version, "Request")
+
+        old_stage = req.stage
+        now = datetime.utcnow()
+        if RequestStage(new_stage) != RequestStage(old_stage):
+            import stage_log
+            stage_log.record(db, [stage_log.transition(req, new_stage, now, actor_id)])
+            req.stage_entered_at = now
         req.stage = new_stage
+        # close_date marks when the request left the open stages; reopening clears it
+        closed_at = req.close_date
+        closing = reliability.is_closed(new_stage) and not reliability.is_closed(old_stage)
+        reopening = reliability.is_closed(old_stage) and not reliability.is_closed(new_stage)
+        if closing:
+            req.close_date = now
+        elif reopening:
+            req.close_date = None
+        counters.on_request_stage_changed(db, req, old_stage, RequestStage(new_stage))
+        if workload.is_open(old_stage) != workload.is_open(new_stage):
+            hours = req.duration_hours or 0.0
+            workload.adjust_on_commit(db, req.technician_id, hours if workload.is_open(new_stage) else -hours)
         
         # Logic: If Scrap, update Equipment
-        if new_stage == schemas.RequestStage.scrap:
-             if req.equipment:
-                 req.equipment.status = EquipmentStatus.scrapped
-                 db.add(req.equipment) # Mark for update
+        if new_stage == schemas.RequestStage.scrap and req.equipment_id:
+            scrapped = _scrap_equipment(db, [req.equipment_id])
+            if scrapped:
+                counters.on_equipment_scrapped(db, [status for _, status in scrapped])
+                cache.invalidate_on_commit(db, cache.EQUIPMENT, cache.equipment_key(req.equipment_id))
 
+        _flush_versioned(db, "Request", req_id)
+        if closing or reopening:
+            reliability.apply(db, [reliability.closure(req, 1) if closing else reliability.closure(req, -1, closed_at)])
+        events.publish_on_commit(db, events.request_event("request.stage_changed", req, from_stage=old_stage))
         db.commit()
         db.refresh(req)
         return req
+
+    @staticmethod
+    def bulk_change_stage(db: Session, items: List[schemas.StageChange], actor_id: Optional[int] = None):
+        """Apply change_stage to a batch: one lookup, one UPDATE per target stage, one scrap cascade."""
+        if len(items) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"Bulk requests are limited to {BULK_MAX_ROWS} rows")
+
+        current = {}
+        for chunk in _chunks(list({item.id for item in items}), IN_CHUNK_SIZE):
+            for row in db.query(
+                MaintenanceRequest.id, MaintenanceRequest.stage, MaintenanceRequest.priority,
+                MaintenanceRequest.team_id, MaintenanceRequest.technician_id,
+                MaintenanceRequest.equipment_id, MaintenanceRequest.duration_hours, MaintenanceRequest.version,
+                MaintenanceRequest.req_type, MaintenanceRequest.created_at, MaintenanceRequest.close_date,
+                MaintenanceRequest.stage_entered_at,
+            ).filter(MaintenanceRequest.id.in_(chunk)):
+                current[row.id] = row
+
+        archived = set()
+        for chunk in _chunks(list({item.id for item in items} - current.keys()), IN_CHUNK_SIZE):
+            archived |= archive.archived_ids(db, chunk)
+
+        results, moves, seen = [], {}, set()
+        for index, item in enumerate(items):
+            row = current.get(item.id)
+            if row is None:
+                error = "Request is archived (read-only)" if item.id in archived else "Request not found"
+            else:
+                error = "Duplicate id in batch" if item.id in seen else None
+            if error is None and item.version is not None and item.version != row.version:
+                error = f"Version conflict: request is at version {row.version}"
+            if error:
+                results.append({"index": index, "id": item.id, "error": error})
+                continue
+            seen.add(item.id)
+            new_stage = RequestStage(item.stage)
+            results.append({"index": index, "id": item.id, "stage": new_stage, "from_stage": row.stage, "version": row.version})
+            if new_stage != row.stage:
+                # Grouped by whether close_date is set, cleared or kept, so each group is one UPDATE
+                sign = reliability.is_closed(new_stage) - reliability.is_closed(row.stage)
+                moves.setdefault((new_stage, sign), []).append((len(results) - 1, row))
+
+        # Compare-and-swap per row: a request changed since the lookup above is reported, not overwritten
+        table = MaintenanceRequest.__table__
+        changes, closures = [], []
+        now = datetime.utcnow()
+        for (stage, sign), moved in moves.items():
+            values = {"stage": stage, "stage_entered_at": now, "version": table.c.version + 1}
+            if sign:
+                values["close_date"] = now if sign > 0 else None
+            for chunk in _chunks(moved, IN_CHUNK_SIZE):
+                won = set(db.scalars(
+                    update(table)
+                    .where(tuple_(table.c.id, table.c.version).in_([(row.id, row.version) for _, row in chunk]))
+                    .values(**values)
+                    .returning(table.c.id)
+                ))
+                for position, row in chunk:
+                    if row.id in won:
+                        results[position]["version"] = row.version + 1
+                        changes.append((row, stage))
+                        if sign:
+                            closures.append(reliability.closure(row, sign, now if sign > 0 else None))
+                    else:
+                        results[position] = {"index": results[position]["index"], "id": row.id, "error": "Version conflict: request was modified concurrently"}
+        failed = sum(1 for result in results if "error" in result)
+
+        # Logic: If Scrap, update Equipment (all of it in one UPDATE per chunk)
+        scrapped = _scrap_equipment(
+            db, list({row.equipment_id for row, stage in changes if stage == RequestStage.scrap and row.equipment_id})
+        )
+
+        counters.on_requests_stage_changed(db, [(row.team_id, row.stage, stage) for row, stage in changes])
+        import stage_log
+        stage_log.record(db, [stage_log.transition(row, stage, now, actor_id) for row, stage in changes])
+        reliability.apply(db, closures)
+        counters.on_equipment_scrapped(db, [status for _, status in scrapped])
+        if scrapped:
+            cache.invalidate_on_commit(db, cache.EQUIPMENT, *(cache.equipment_key(eq_id) for eq_id, _ in scrapped))
+        for row, stage in changes:
+            if workload.is_open(row.stage) != workload.is_open(stage):
+                hours = row.duration_hours or 0.0
+                workload.adjust_on_commit(db, row.technician_id, hours if workload.is_open(stage) else -hours)
+            events.publish_on_commit(db, events.request_event(
+                "request.stage_changed", row, stage=stage, from_stage=row.stage, version=row.version + 1,
+            ))
+        db.commit()
+        return {"updated": len(changes), "failed": failed, "equipment_scrapped": len(scrapped), "results": results}
+
+    @staticmethod
+    def _calendar_query(db: Session, team_id: Optional[int], model=MaintenanceRequest):
+        # Only the columns the calendar renders, with the equipment name joined in
+        query = db.query(
+            model.id,
+            model.subject,
+            model.req_type,
+            model.stage,
+            model.priority,
+            model.scheduled_date,
+            model.duration_hours,
+            model.equipment_id,
+            Equipment.name.label("equipment_name"),
+            model.team_id,
+            model.technician_id,
+        ).outerjoin(Equipment, Equipment.id == model.equipment_id)
+        if team_id is not None:
+            query = query.filter(model.team_id == team_id)
+        return query
+
+    @staticmethod
+    def get_calendar(db: Session, start: date, end: date, team_id: Optional[int] = None):
+        if end < start:
+            raise HTTPException(status_code=400, detail="Calendar end must not be before start")
+        if (end - start).days + 1 > CALENDAR_MAX_DAYS:
+            raise HTTPException(status_code=400, detail=f"Calendar range is limited to {CALENDAR_MAX_DAYS} days")
+
+        # Range scan on ix_requests_scheduled_date_id (or ix_requests_team_scheduled_date with a team);
+        # a range reaching back into the archive also scans ix_requests_archive_scheduled_date_id
+        low, high = datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+        models = [MaintenanceRequest]
+        if archive.reaches(db, scheduled_date=(low, high)):
+            models.append(ArchivedRequest)
+        rows = []
+        for model in models:
+            rows += (
+                Service._calendar_query(db, team_id, model)
+                .filter(model.scheduled_date >= low, model.scheduled_date < high)
+                .order_by(model.scheduled_date)
+                .all()
+            )
+        if len(models) > 1:
+            rows.sort(key=lambda row: row.scheduled_date)
+
+        days = {}
+        for row in rows:
+            bucket = days.setdefault(row.scheduled_date.date(), {"preventive": [], "corrective": []})
+            key = "preventive" if row.req_type == RequestType.preventive else "corrective"
+            bucket[key].append(row)
+
+        # Open work from now on, a range scan of the partial ix_requests_open_stage_scheduled_date
+        upcoming = (
+            Service._calendar_query(db, team_id)
+            .filter(overdue.is_open(), MaintenanceRequest.scheduled_date >= datetime.now())
+            .order_by(MaintenanceRequest.scheduled_date)
+            .limit(UPCOMING_LIMIT)
+            .all()
+        )
+
+        return {
+            "start": start,
+            "end": end,
+            "days": [{"day": day, **bucket} for day, bucket in sorted(days.items())],
+            "upcoming": upcoming,
+        }
+
+    @staticmethod
+    def get_due_requests(db: Session, start: Optional[datetime], end: datetime, team_id: Optional[int] = None,
+                         technician_id: Optional[int] = None, req_type: Optional[RequestType] = None,
+                         limit: int = DEFAULT_PAGE_SIZE):
+        """Open requests scheduled in [start, end), earliest first, and how many there are in all.
+
+        Both reads are range scans of the partial ix_requests_open_stage_scheduled_date, which only
+        holds open rows, so their cost follows the open backlog rather than the table.
+        """
+        r = MaintenanceRequest
+        conditions = [overdue.is_open(), r.scheduled_date < end]
+        if start is not None:
+            conditions.append(r.scheduled_date >= start)
+        if team_id is not None:
+            conditions.append(r.team_id == team_id)
+        if technician_id is not None:
+            conditions.append(r.technician_id == technician_id)
+        if req_type:
+            conditions.append(r.req_type == req_type)
+
+        total = db.query(func.count(r.id)).filter(*conditions).scalar()
+        rows = (
+            db.query(*_columns(r, REQUEST_FIELDS))
+            .filter(*conditions)
+            .order_by(r.scheduled_date, r.id)
+            .limit(max(1, min(limit, MAX_PAGE_SIZE)))
+            .all()
+        )
+        return _as_dicts(REQUEST_FIELDS, rows), total
+
+    @staticmethod
+    def get_overdue(db: Session, **filters):
+        return Service.get_due_requests(db, None, datetime.now(), **filters)
+
+    @staticmethod
+    def get_due_today(db: Session, **filters):
+        today = datetime.combine(date.today(), time.min)
+        return Service.get_due_requests(db, today, today + timedelta(days=1), **filters)
+
+    # --- PREVENTIVE PLANS ---
+    @staticmethod
+    def create_plan(db: Session, plan_in: schemas.PreventivePlanCreate):
+        equipment = db.query(Equipment).filter(Equipment.id == plan_in.equipment_id).first()
+        if not equipment:
+            raise HTTPException(status_code=404, detail="Equipment not found")
+        if equipment.status == EquipmentStatus.scrapped:
+            raise HTTPException(status_code=400, detail="Cannot plan maintenance for scrapped equipment")
+        if plan_in.interval_value < 1:
+            raise HTTPException(status_code=400, detail="Plan interval must be at least 1")
+        if plan_in.daily_runtime_hours <= 0:
+            raise HTTPException(status_code=400, detail="Daily runtime hours must be positive")
+
+        data = plan_in.dict()
+        db_plan = PreventivePlan(next_due=data.pop("start_date"), **data)
+        db.add(db_plan)
+        db.commit()
+        db.refresh(db_plan)
+        return db_plan
+
+    @staticmethod
+    def get_plans(db: Session, equipment_id: Optional[int] = None):
+        query = db.query(PreventivePlan)
+        if equipment_id is not None:
+            query = query.filter(PreventivePlan.equipment_id == equipment_id)
+        return query.order_by(PreventivePlan.id).all()
+
+    # --- SEARCH ---
+    @staticmethod
+    def search(db: Session, q: str, kind: schemas.SearchKind = schemas.SearchKind.all,
+               sort: schemas.SearchSort = schemas.SearchSort.relevance, limit: int = 20, offset: int = 0):
+        if offset > SEARCH_MAX_OFFSET:
+            raise HTTPException(status_code=400, detail=f"Search results are limited to the first {SEARCH_MAX_OFFSET} hits")
+        import search
+        return search.search(db, q, kind.value, sort.value, max(1, min(limit, SEARCH_MAX_LIMIT)), offset)
+
+    # --- REPORTS ---
+    @staticmethod
+    def get_report_summary(db: Session, top: int = 5):
+        return counters.summary(db, top)
+
+    @staticmethod
+    def get_reliability(db: Session, scope: schemas.ReliabilityScope, key: Optional[str] = None, limit: int = 100):
+        return reliability.report(db, scope.value, key, limit)
+
+    @staticmethod
+    def get_stage_history(db: Session, req_id: int):
+        import stage_log
+        return stage_log.history(db, req_id)
+
+    @staticmethod
+    def get_cycle_times(db: Session, group_by: Optional[schemas.CycleTimeGroup] = None, since: Optional[datetime] = None,
+                        until: Optional[datetime] = None, team_id: Optional[int] = None, technician_id: Optional[int] = None):
+        import stage_log
+        return stage_log.cycle_times(db, group_by.value if group_by else None, since, until, team_id, technician_id)
+
+    @staticmethod
+    def get_daily_rollups(db: Session, start: date, end: date, team_id: Optional[int] = None):
+        return counters.daily(db, start, end, team_id)
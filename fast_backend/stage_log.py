@@ -0,0 +1,214 @@
+"""Append-only stage transition log (request_stage_events), written behind the request.
+
+A stage change only queues its transitions on the session; once the change commits, they go to
+a background thread that inserts them in batches, FLUSH_INTERVAL_SECONDS apart at most (sooner
+when BATCH_SIZE rows are waiting). Kanban drags then cost no log write on the request path, and
+the log rows of many moves share one insert and one commit. The price is that a crash loses the
+last interval of log rows (never a stage change): STAGE_LOG_SYNC=1 writes them inside the change's
+own transaction instead, so the log commits or rolls back with it.
+"""
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+from models import MaintenanceTeam, RequestStage, RequestStageEvent, User
+import database
+import reliability
+
+logger = logging.getLogger(__name__)
+
+SYNC = os.getenv("STAGE_LOG_SYNC", "0") == "1"
+FLUSH_INTERVAL_SECONDS = float(os.getenv("STAGE_LOG_FLUSH_INTERVAL", "1.0"))
+BATCH_SIZE = int(os.getenv("STAGE_LOG_BATCH_SIZE", "1000"))
+# Rows kept while the database refuses them; past this the oldest are dropped (and logged)
+MAX_BUFFERED = int(os.getenv("STAGE_LOG_MAX_BUFFERED", "100000"))
+
+TEAM = "team"
+TECHNICIAN = "technician"
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at is timezone-aware on Postgres; everything in the log is naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def transition(req, to_stage, at: datetime, actor_id: Optional[int] = None) -> dict:
+    """Log row for `req` (ORM object or row, still showing its old stage) moving to `to_stage`."""
+    return {
+        "request_id": req.id,
+        "from_stage": RequestStage(req.stage),
+        "to_stage": RequestStage(to_stage),
+        "actor_id": actor_id,
+        "team_id": req.team_id,
+        "technician_id": req.technician_id,
+        "entered_at": _naive_utc(req.stage_entered_at or req.created_at),
+        "at": at,
+    }
+
+# --- Writing ---
+
+def _insert(db: Session, rows: list):
+    db.execute(insert(RequestStageEvent), rows)
+
+class LogWriter:
+    """Buffers committed transitions and inserts them from one daemon thread."""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL_SECONDS, batch_size: int = BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    def add(self, rows: list):
+        with self._cond:
+            self._pending.extend(rows)
+            if len(self._pending) > MAX_BUFFERED:
+                dropped = len(self._pending) - MAX_BUFFERED
+                del self._pending[:dropped]
+                logger.error("Stage log buffer full; dropped the %d oldest transitions", dropped)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._loop, name="stage-log-writer", daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self):
+        """Write everything buffered so far; rows the database refuses stay buffered for the next try."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._pending = self._pending, []
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                try:
+                    self._write(chunk)
+                except Exception:
+                    logger.exception("Stage log flush failed; %d transitions kept for the next try", len(rows) - start)
+                    with self._cond:
+                        self._pending[:0] = rows[start:]
+                    return
+
+    @staticmethod
+    def _write(rows: list):
+        # The SQLite production profile has a single writer; everything else commits on its own
+        if database.write_queue is not None:
+            database.write_queue.submit(_insert, rows).result()
+            return
+        db = database.SessionLocal()
+        try:
+            _insert(db, rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def stop(self):
+        with self._cond:
+            thread, self._stopping = self._thread, True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        self._thread = None
+        self.flush()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            self.flush()
+
+writer = LogWriter()
+# Scripts (seed, bench) exit without the app's shutdown hook
+atexit.register(writer.stop)
+
+_PENDING = "stage_log_pending"
+
+def record(db: Session, rows: list):
+    """Log transitions as part of the caller's write (called by Service before it commits)."""
+    if not rows:
+        return
+    if SYNC:
+        _insert(db, rows)
+    else:
+        db.info.setdefault(_PENDING, []).extend(rows)
+
+@event.listens_for(Session, "after_commit")
+def _hand_over_committed(session):
+    rows = session.info.pop(_PENDING, None)
+    if rows:
+        writer.add(rows)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+# --- Reads ---
+
+def history(db: Session, request_id: int) -> list:
+    """Transitions of one request in order (up to FLUSH_INTERVAL_SECONDS behind the latest moves)."""
+    return (
+        db.query(RequestStageEvent)
+        .filter(RequestStageEvent.request_id == request_id)
+        .order_by(RequestStageEvent.id)
+        .all()
+    )
+
+def cycle_times(db: Session, group_by: Optional[str] = None, since: Optional[datetime] = None,
+                until: Optional[datetime] = None, team_id: Optional[int] = None,
+                technician_id: Optional[int] = None) -> list:
+    """Time spent in each stage by the transitions that left it in [since, until).
+
+    One GROUP BY over the log (ix_stage_events_at for the window): every row carries how long its
+    request sat in from_stage, so no row needs its predecessor.
+    """
+    e = RequestStageEvent
+    hours = reliability.hours_sql(db, e.entered_at, e.at)
+    key = {TEAM: e.team_id, TECHNICIAN: e.technician_id}.get(group_by)
+    keys = [key] if key is not None else []
+    query = (
+        select(e.from_stage, *keys, func.count(), func.avg(hours), func.min(hours), func.max(hours))
+        .where(e.entered_at.isnot(None))
+        .group_by(e.from_stage, *keys)
+    )
+    if since is not None:
+        query = query.where(e.at >= since)
+    if until is not None:
+        query = query.where(e.at < until)
+    if team_id is not None:
+        query = query.where(e.team_id == team_id)
+    if technician_id is not None:
+        query = query.where(e.technician_id == technician_id)
+    rows = db.execute(query).all()
+
+    names = {}
+    ids = [row[1] for row in rows if key is not None and row[1] is not None]
+    if ids and group_by == TEAM:
+        names = dict(db.query(MaintenanceTeam.id, MaintenanceTeam.name).filter(MaintenanceTeam.id.in_(set(ids))))
+    elif ids and group_by == TECHNICIAN:
+        names = dict(db.query(User.id, User.full_name).filter(User.id.in_(set(ids))))
+
+    result = []
+    for row in rows:
+        stage, group_key = row[0], row[1] if key is not None else None
+        count, avg_hours, min_hours, max_hours = row[-4:]
+        result.append({
+            "stage": stage,
+            "key": None if group_key is None else str(group_key),
+            "name": names.get(group_key),
+            "transitions": count,
+            "avg_hours": round(float(avg_hours), 2),
+            "min_hours": round(float(min_hours), 2),
+            "max_hours": round(float(max_hours), 2),
+        })
+    result.sort(key=lambda item: (list(RequestStage).index(RequestStage(item["stage"])), item["key"] or ""))
+    return result
@@ -0,0 +1,90 @@
+"""?expand= must cost the same number of statements on a 5-row page as on a 200-row one (no N+1).
+
+Run with `python -m pytest -q` from fast_backend; each case builds its own in-memory database.
+"""
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from models import Base, Equipment, MaintenanceRequest, MaintenanceTeam, RequestType, User, UserRole
+from services import Service, REQUEST_EXPANSIONS, EQUIPMENT_EXPANSIONS
+
+SMALL, LARGE = 5, 200
+
+def _database(rows: int):
+    """`rows` of every kind, each request and asset pointing at its own team and users."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    for i in range(rows):
+        team = MaintenanceTeam(name=f"Team {i}")
+        tech = User(email=f"tech{i}@example.com", password_hash="x", full_name=f"Tech {i}", role=UserRole.technician)
+        author = User(email=f"user{i}@example.com", password_hash="x", full_name=f"User {i}", role=UserRole.manager)
+        equipment = Equipment(name=f"Asset {i}", serial_number=f"SN-{i}", team=team, assigned_technician=tech)
+        db.add(MaintenanceRequest(
+            subject=f"Request {i}", req_type=RequestType.corrective,
+            equipment=equipment, team=team, technician=tech, created_by=author,
+        ))
+    db.commit()
+    db.close()
+    return engine
+
+@pytest.fixture(scope="module")
+def databases():
+    return {rows: _database(rows) for rows in (SMALL, LARGE)}
+
+@contextmanager
+def _counting(engine):
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+def _touch(rows, expand: frozenset, allowed: dict):
+    # What the response serializer reads; a lazy load here would be the N+1
+    for row in rows:
+        for name in expand:
+            getattr(row, allowed[name].key)
+
+def _expand_values(allowed: dict) -> list:
+    return [frozenset([name]) for name in allowed] + [frozenset(allowed)]
+
+def _request_statements(engine, rows: int, expand: frozenset) -> int:
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        with _counting(engine) as statements:
+            page, _ = Service.get_requests(db, limit=rows, expand=expand, plain=not expand)
+            _touch(page, expand, REQUEST_EXPANSIONS)
+        assert len(page) == rows
+        return len(statements)
+    finally:
+        db.close()
+
+def _equipment_statements(engine, rows: int, expand: frozenset) -> int:
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        with _counting(engine) as statements:
+            items = Service.get_equipment(db, expand=expand, plain=not expand)
+            _touch(items, expand, EQUIPMENT_EXPANSIONS)
+        assert len(items) == rows
+        return len(statements)
+    finally:
+        db.close()
+
+@pytest.mark.parametrize("expand", _expand_values(REQUEST_EXPANSIONS), ids=lambda value: ",".join(sorted(value)))
+def test_request_expansions_cost_constant_statements(databases, expand):
+    assert _request_statements(databases[SMALL], SMALL, expand) == _request_statements(databases[LARGE], LARGE, expand)
+
+@pytest.mark.parametrize("expand", _expand_values(EQUIPMENT_EXPANSIONS), ids=lambda value: ",".join(sorted(value)))
+def test_equipment_expansions_cost_constant_statements(databases, expand):
+    assert _equipment_statements(databases[SMALL], SMALL, expand) == _equipment_statements(databases[LARGE], LARGE, expand)
+
+def test_plain_lists_cost_constant_statements(databases):
+    empty = frozenset()
+    assert _request_statements(databases[SMALL], SMALL, empty) == _request_statements(databases[LARGE], LARGE, empty)
+    assert _equipment_statements(databases[SMALL], SMALL, empty) == _equipment_statements(databases[LARGE], LARGE, empty)
@@ -0,0 +1,119 @@
+import heapq
+import os
+import threading
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from models import MaintenanceRequest, RequestStage, team_members
+
+OPEN_STAGES = (RequestStage.new, RequestStage.in_progress)
+
+# ASSIGNMENT_MODE=least_loaded makes it the default for requests that don't pick a mode themselves
+DEFAULT_ASSIGNMENT_MODE = os.getenv("ASSIGNMENT_MODE", "equipment")
+# Seconds between rebuilds from the database (picks up other workers' writes and membership edits)
+REFRESH_SECONDS = int(os.getenv("WORKLOAD_REFRESH_SECONDS", "300"))
+
+def is_open(stage) -> bool:
+    return RequestStage(stage) in OPEN_STAGES
+
+class WorkloadIndex:
+    """Open duration_hours per technician plus team membership, kept in memory.
+
+    Each team has a min-heap of (load, user_id). A load change pushes a fresh entry and stale
+    ones are skipped when they reach the top, so both least_loaded() and adjust() are O(log n);
+    membership checks are set lookups.
+
+    The index is the source of membership for every check Service makes. The API has no
+    membership write path (team_members is written by seed scripts and admin tools), so edits
+    show up at the next rebuild: at startup and every REFRESH_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load = defaultdict(float)
+        self._members = defaultdict(set)      # team_id -> user ids
+        self._user_teams = defaultdict(set)   # user_id -> team ids
+        self._heaps = {}
+
+    def rebuild(self, db: Session):
+        memberships = db.execute(select(team_members.c.team_id, team_members.c.user_id)).all()
+        loads = (
+            db.query(MaintenanceRequest.technician_id, func.coalesce(func.sum(MaintenanceRequest.duration_hours), 0.0))
+            .filter(MaintenanceRequest.technician_id.isnot(None), MaintenanceRequest.stage.in_(OPEN_STAGES))
+            .group_by(MaintenanceRequest.technician_id)
+            .all()
+        )
+        load = defaultdict(float, {user_id: float(total) for user_id, total in loads})
+        members, user_teams = defaultdict(set), defaultdict(set)
+        for team_id, user_id in memberships:
+            members[team_id].add(user_id)
+            user_teams[user_id].add(team_id)
+        heaps = {}
+        for team_id, users in members.items():
+            heaps[team_id] = [(load[user_id], user_id) for user_id in users]
+            heapq.heapify(heaps[team_id])
+
+        with self._lock:
+            self._load, self._members, self._user_teams, self._heaps = load, members, user_teams, heaps
+
+    def is_member(self, team_id: int, user_id: int) -> bool:
+        with self._lock:
+            return user_id in self._members.get(team_id, ())
+
+    def load_of(self, user_id: int) -> float:
+        with self._lock:
+            return self._load.get(user_id, 0.0)
+
+    def least_loaded(self, team_id: int) -> Optional[int]:
+        with self._lock:
+            heap = self._heaps.get(team_id)
+            while heap:
+                load, user_id = heap[0]
+                if load == self._load[user_id] and user_id in self._members[team_id]:
+                    return user_id
+                heapq.heappop(heap)  # stale entry
+            return None
+
+    def adjust(self, user_id: Optional[int], delta: float):
+        if user_id is None or not delta:
+            return
+        with self._lock:
+            self._load[user_id] += delta
+            load = self._load[user_id]
+            for team_id in self._user_teams.get(user_id, ()):
+                heap = self._heaps[team_id]
+                heapq.heappush(heap, (load, user_id))
+                if len(heap) > 4 * len(self._members[team_id]) + 16:
+                    # Drop the stale entries before they dominate the heap
+                    self._heaps[team_id] = [(self._load[u], u) for u in self._members[team_id]]
+                    heapq.heapify(self._heaps[team_id])
+
+index = WorkloadIndex()
+
+# --- Load changes from Service, applied once the write commits ---
+
+_PENDING = "workload_pending"
+
+def adjust_on_commit(db: Session, user_id: Optional[int], delta: float):
+    if user_id is not None and delta:
+        db.info.setdefault(_PENDING, []).append((user_id, delta))
+
+def on_requests_created(db: Session, rows: list):
+    """Batch form for bulk and scheduler inserts (rows are column dicts)."""
+    totals = defaultdict(float)
+    for row in rows:
+        if row["technician_id"] is not None and is_open(row["stage"]):
+            totals[row["technician_id"]] += row["duration_hours"] or 0.0
+    for user_id, delta in totals.items():
+        adjust_on_commit(db, user_id, delta)
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session):
+    for user_id, delta in session.info.pop(_PENDING, ()):
+        index.adjust(user_id, delta)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
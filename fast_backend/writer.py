@@ -0,0 +1,113 @@
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+class GroupCommitSession(Session):
+    """Session handed to Service by the writer: Service's commit() only flushes.
+
+    The writer commits once for the whole group, so N queued writes cost one fsync.
+    """
+
+    def commit(self):
+        self.flush()
+
+    def commit_group(self):
+        super().commit()
+
+class WriteQueue:
+    """Serializes every write through one thread and one connection, with group commit.
+
+    Each job runs inside its own SAVEPOINT, so a job that raises (e.g. an HTTPException from
+    validation) is rolled back alone while the rest of its group still commits.
+    """
+
+    def __init__(self, bind, max_batch: int = 64):
+        self.bind = bind
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join()
+            self._thread = None
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        self.start()
+        future = Future()
+        # The caller's context goes along so per-request instrumentation sees the job's statements
+        self._queue.put((future, contextvars.copy_context(), fn, args, kwargs))
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch = [job]
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._run_batch(batch)
+            if stopping:
+                return
+
+    @staticmethod
+    def _run_job(session, fn, args, kwargs):
+        with session.begin_nested():
+            return fn(session, *args, **kwargs)
+
+    def _run_batch(self, batch):
+        session = GroupCommitSession(bind=self.bind, autoflush=False, expire_on_commit=False)
+        done = []
+        try:
+            for future, context, fn, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # session.info carries per-commit side effects (events, cache keys); a failed job's must go too
+                info = {key: value.copy() if hasattr(value, "copy") else value for key, value in session.info.items()}
+                try:
+                    result = context.run(self._run_job, session, fn, args, kwargs)
+                except BaseException as e:
+                    session.info.clear()
+                    session.info.update(info)
+                    future.set_exception(e)
+                else:
+                    done.append((future, result))
+            session.commit_group()
+        except Exception as e:
+            logger.exception("Group commit failed")
+            session.rollback()
+            for future, _ in done:
+                future.set_exception(e)
+            return
+        finally:
+            # Results stay loaded (expire_on_commit=False) and are detached before other threads read them
+            session.close()
+        for future, result in done:
+            future.set_result(result)